@@ -1,10 +1,12 @@
+import functools
 import math
 import multiprocessing
-import queue
 import random
 import os
 import pygame
 import signal
+import struct
+from array import array
 
 """
 Annalisa Comin
@@ -21,6 +23,85 @@ Classes:
 - EyesController: Interface for controlling the MonkeyEyeApp externally.
 """
 
+# Unit vectors of the star's outer tips and inner corners, starting at the top.
+_STAR_ANGLES = [math.pi * 2 * i / 10 - math.pi / 2 for i in range(10)]
+_STAR_UNIT_OUTER = tuple((math.cos(angle), math.sin(angle)) for angle in _STAR_ANGLES[0::2])
+_STAR_UNIT_INNER = tuple((math.cos(angle), math.sin(angle)) for angle in _STAR_ANGLES[1::2])
+
+# One period of the listening pulse, (sin + 1) / 2 sampled at 256 steps.
+_PULSE_STEPS = 256
+_PULSE_LUT = tuple((math.sin(math.pi * 2 * i / _PULSE_STEPS) + 1) / 2.0 for i in range(_PULSE_STEPS))
+
+@functools.lru_cache(maxsize=16)
+def _get_rect_surface(size, radius, color):
+    """
+    Returns a cached surface with a rounded rectangle of the given size and color.
+
+    Only meant for the static resting size of an eye (idle, not listening,
+    error). Blink, concentrate and listening change the size every frame, so
+    caching those would allocate a new sprite per frame and evict the static ones.
+    """
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    pygame.draw.rect(surface, color, surface.get_rect(), border_radius=radius)
+    return _to_display_format(surface)
+
+def _to_display_format(surface):
+    """
+    Converts a cached sprite to the pixel format of the display, if one is set.
+
+    Blits between surfaces of the same format are plain memory copies, so
+    converting each sprite once avoids a per-pixel conversion on every frame.
+    """
+    if pygame.display.get_surface() is None:
+        return surface
+    if surface.get_flags() & pygame.SRCALPHA:
+        return surface.convert_alpha()
+    return surface.convert()
+
+# Angle resolution of the pre-rendered loader frames in degrees
+_LOADER_ANGLE_STEP = 5
+
+@functools.lru_cache(maxsize=4)
+def _get_loader_frames(radius, color, width):
+    """
+    Returns the 270-degree loader arc pre-rendered at every _LOADER_ANGLE_STEP degrees.
+
+    Frame i shows the arc starting at i * _LOADER_ANGLE_STEP degrees, so the
+    loading animation only picks and blits a frame instead of rasterizing an arc.
+    """
+    base = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+    pygame.draw.arc(base, color, base.get_rect(), 0, math.radians(270), width)
+    return tuple(_to_display_format(pygame.transform.rotozoom(base, angle, 1.0)) for angle in range(0, 360, _LOADER_ANGLE_STEP))
+
+@functools.lru_cache(maxsize=16)
+def _get_crescent_surface(radius, overlay_circle_offset, color, background_color):
+    """
+    Returns a cached surface with the crescent shape of a laughing/smiling eye.
+
+    The crescent is the eye circle partly covered by a larger background circle
+    below it, rasterized once instead of overdrawing both circles every frame.
+    """
+    size = radius * 2 + 2
+    center = radius + 1
+    surface = pygame.Surface((size, size))
+    surface.fill(background_color)
+    pygame.draw.circle(surface, color, (center, center), radius)
+    pygame.draw.circle(surface, background_color, (center, center + overlay_circle_offset), radius + 60)
+    return _to_display_format(surface)
+
+@functools.lru_cache(maxsize=16)
+def _get_error_surface(size, radius, eye_color, x_color, x_width):
+    """Returns a cached surface with the red error eye and its white X."""
+    surface = _get_rect_surface(size, radius, eye_color).copy()
+    width, height = size
+    center_x, center_y = width // 2, height // 2
+    x_size = width // 4 # Größe des X basierend auf der Augengröße
+
+    # Zeichne die beiden Linien für das X
+    pygame.draw.line(surface, x_color, (center_x - x_size, center_y - x_size), (center_x + x_size, center_y + x_size), x_width)
+    pygame.draw.line(surface, x_color, (center_x + x_size, center_y - x_size), (center_x - x_size, center_y + x_size), x_width)
+    return surface
+
 class Eye:
     """
     Represents a single eye with position, size, and rendering logic.
@@ -39,107 +120,119 @@ class Eye:
         self.radius = radius
         self.color = color
         self.original_color = color
+        self.center_x = 0
+        self.center_y = 0
+        self.update_center()
+        self._scratch_rect = pygame.Rect(0, 0, 0, 0)
 
     def draw(self, screen):
         """Draws the eye as a rounded rectangle."""
-        pygame.draw.rect(screen, self.color, self.rect, border_radius=self.radius)
+        if self.rect.size == self.original_rect.size:
+            screen.blit(_get_rect_surface(self.rect.size, self.radius, self.color), self.rect.topleft)
+        else:
+            pygame.draw.rect(screen, self.color, self.rect, border_radius=self.radius)
 
     def grow(self, width, height):
         """Inflates (or shrinks) the eye by width and height."""
         self.rect.inflate_ip(width, height)
+        self.update_center()
 
     def move(self, x, y):
         """Moves the eye position by the given x and y offsets."""
         self.rect.move_ip(x, y)
+        self.update_center()
 
     def reset_position(self):
         """Resets the eye to its original position."""
         self.rect.x = self.original_rect.x
         self.rect.y = self.original_rect.y
+        self.update_center()
 
     def reset_size(self):
         """Resets the eye to its original width and height."""
         self.rect.width = self.original_rect.width
         self.rect.height = self.original_rect.height
+        self.update_center()
+
+    def set_size_centered(self, width, height):
+        """Sets the eye size, keeping it centered on its original position."""
+        self.rect.size = (width, height)
+        self.rect.center = self.original_rect.center
+        self.update_center()
 
     def reset(self):
         """Resets both position and size of the eye."""
         self.reset_position()
         self.reset_size()
 
-    def get_center(self):
-        """Returns the (x, y) center of the eye."""
-        return (self.rect.x + self.rect.width // 2, self.rect.y + self.rect.height // 2)
+    def update_center(self):
+        """Recomputes center_x and center_y, needed after self.rect was modified directly."""
+        self.center_x = self.rect.x + (self.rect.width >> 1)
+        self.center_y = self.rect.y + (self.rect.height >> 1)
 
     def draw_circular(self, screen, background_color, vertical_offset=0, overlay_circle_offset=150):
         """
         Draws the eye as a circular laughing/smiling representation.
         """
-        center_x, center_y = self.get_center()
-        center_y += vertical_offset
+        center_x = self.center_x
+        center_y = self.center_y
         radius = self.rect.height // 2
-        
-        pygame.draw.circle(screen, self.color, (center_x, center_y), radius)
-        pygame.draw.circle(screen, background_color, (center_x, center_y + overlay_circle_offset), radius + 60)
+        surface = _get_crescent_surface(radius, overlay_circle_offset, self.color, background_color)
+        screen.blit(surface, (center_x - radius - 1, center_y + vertical_offset - radius - 1))
+
+    def get_circular_bounds(self, vertical_offset=0, out=None):
+        """
+        Returns the screen area touched by draw_circular with the same vertical offset.
+
+        If out is given, that Rect is updated in place and returned.
+        """
+        center_x = self.center_x
+        center_y = self.center_y
+        radius = self.rect.height // 2
+        if out is None:
+            out = pygame.Rect(0, 0, 0, 0)
+        out.update(center_x - radius - 1, center_y + vertical_offset - radius - 1, radius * 2 + 2, radius * 2 + 2)
+        return out
 
     def draw_star(self, screen, color=(255, 255, 0), scale=1.0):
         """
         Draws a star shape within the eye area.
         """
-        cx, cy = self.get_center()
+        cx = self.center_x
+        cy = self.center_y
         radius = min(self.rect.width, self.rect.height) // 2 * scale
         inner_radius = radius * 0.4
         
         points = []
-        for i in range(10):
-            angle = math.pi * 2 * i / 10 - math.pi / 2
-            current_radius = radius if i % 2 == 0 else inner_radius
-            x = cx + current_radius * math.cos(angle)
-            y = cy + current_radius * math.sin(angle)
-            points.append((x, y))
+        for (outer_x, outer_y), (inner_x, inner_y) in zip(_STAR_UNIT_OUTER, _STAR_UNIT_INNER):
+            points.append((cx + radius * outer_x, cy + radius * outer_y))
+            points.append((cx + inner_radius * inner_x, cy + inner_radius * inner_y))
         
-        if len(points) > 2:
-            pygame.draw.polygon(screen, color, points)
+        pygame.draw.polygon(screen, color, points)
 
     def draw_loader(self, screen, angle, color=(255, 255, 255), width=15):
         """
         Draws a spinning loader arc inside the eye.
         """
-        center = self.get_center()
         radius = min(self.rect.width, self.rect.height) // 3
         
         # Draw the background of the eye
         self.draw(screen)
 
-        # Define the rectangle for the arc
-        arc_rect = pygame.Rect(center[0] - radius, center[1] - radius, radius * 2, radius * 2)
-        
-        # Calculate start and end angles for the arc
-        start_angle = math.radians(angle)
-        end_angle = math.radians(angle + 270) # Draw a 270-degree arc
-        
-        # Draw the arc
-        pygame.draw.arc(screen, color, arc_rect, start_angle, end_angle, width)
+        # Pick the pre-rendered arc closest to the current angle
+        frames = _get_loader_frames(radius, color, width)
+        frame = frames[int(angle // _LOADER_ANGLE_STEP) % len(frames)]
+        self._scratch_rect.size = frame.get_size()
+        self._scratch_rect.centerx = self.center_x
+        self._scratch_rect.centery = self.center_y
+        screen.blit(frame, self._scratch_rect)
 
     def draw_error(self, screen, eye_color=(255, 0, 0), x_color=(255, 255, 255), x_width=20):
         """
         Draws the eye with a red background and a white X.
         """
-        # Zeichne den roten Hintergrund
-        pygame.draw.rect(screen, eye_color, self.rect, border_radius=self.radius)
-
-        # Berechne die Punkte für das X
-        center_x, center_y = self.get_center()
-        size = self.rect.width // 4 # Größe des X basierend auf der Augengröße
-
-        # Zeichne die beiden Linien für das X
-        start_pos1 = (center_x - size, center_y - size)
-        end_pos1 = (center_x + size, center_y + size)
-        pygame.draw.line(screen, x_color, start_pos1, end_pos1, x_width)
-
-        start_pos2 = (center_x + size, center_y - size)
-        end_pos2 = (center_x - size, center_y + size)
-        pygame.draw.line(screen, x_color, start_pos2, end_pos2, x_width)
+        surface = _get_error_surface(self.rect.size, self.radius, eye_color, x_color, x_width)
+        screen.blit(surface, self.rect.topleft)
 
 class EyePair:
     """
@@ -152,6 +245,14 @@ class EyePair:
         self.background_color = background_color
         self.star_color = star_color
         self.loader_color = loader_color
+        self.smile_vertical_offset = 10
+        # Two reusable pairs of bounds rects, so the pair returned for the
+        # previous frame stays valid while the current one is filled in.
+        self._bounds_buffers = (
+            [pygame.Rect(0, 0, 0, 0), pygame.Rect(0, 0, 0, 0)],
+            [pygame.Rect(0, 0, 0, 0), pygame.Rect(0, 0, 0, 0)],
+        )
+        self._bounds_index = 0
 
     def draw_normal(self, screen):
         self.left_eye.draw(screen)
@@ -162,8 +263,8 @@ class EyePair:
         self.right_eye.draw_circular(screen, self.background_color, vertical_offset)
     
     def draw_smiling(self, screen):
-        self.left_eye.draw_circular(screen, self.background_color, 10) 
-        self.right_eye.draw_circular(screen, self.background_color, 10)
+        self.left_eye.draw_circular(screen, self.background_color, self.smile_vertical_offset) 
+        self.right_eye.draw_circular(screen, self.background_color, self.smile_vertical_offset)
 
     def draw_stars(self, screen, scale=1.0):
         self.left_eye.draw_star(screen, self.star_color, scale)
@@ -181,6 +282,57 @@ class EyePair:
         self.left_eye.draw_error(screen, error_eye_color, x_color)
         self.right_eye.draw_error(screen, error_eye_color, x_color)
 
+    def _next_bounds_buffer(self):
+        self._bounds_index ^= 1
+        return self._bounds_buffers[self._bounds_index]
+
+    def get_bounds(self):
+        """
+        Returns the screen areas covered by both eyes in their rectangular states.
+
+        The returned list is reused by the call after next.
+        """
+        bounds = self._next_bounds_buffer()
+        bounds[0].update(self.left_eye.rect)
+        bounds[1].update(self.right_eye.rect)
+        return bounds
+
+    def get_circular_bounds(self, vertical_offset=0):
+        """
+        Returns the screen areas touched when drawing both eyes laughing or smiling.
+
+        The returned list is reused by the call after next.
+        """
+        bounds = self._next_bounds_buffer()
+        self.left_eye.get_circular_bounds(vertical_offset, bounds[0])
+        self.right_eye.get_circular_bounds(vertical_offset, bounds[1])
+        return bounds
+
+    def grow_both(self, width, height):
+        """Inflates (or shrinks) both eyes by the same width and height."""
+        self.left_eye.grow(width, height)
+        self.right_eye.grow(width, height)
+
+    def move_both(self, x, y):
+        """Moves both eyes by the same x and y offsets."""
+        self.left_eye.move(x, y)
+        self.right_eye.move(x, y)
+
+    def set_size_centered(self, width_offset, height_offset):
+        """Sets both eyes to their original size plus the given offsets, keeping them centered."""
+        for eye in (self.left_eye, self.right_eye):
+            eye.set_size_centered(eye.original_rect.width + width_offset, eye.original_rect.height + height_offset)
+
+    def set_color(self, color):
+        """Sets the color of both eyes."""
+        self.left_eye.color = color
+        self.right_eye.color = color
+
+    def restore_color(self):
+        """Restores the color both eyes had before the last temporary color change."""
+        self.left_eye.color = self.left_eye.original_color
+        self.right_eye.color = self.right_eye.original_color
+
     def reset(self):
         self.left_eye.reset()
         self.right_eye.reset()
@@ -199,6 +351,9 @@ class AnimationState:
     LISTENING = "listening"
 
 
+# Number of pre-sampled random blink and look parameters, a power of two
+_RANDOM_POOL_SIZE = 1024
+
 class AnimationManager:
     def __init__(self, eye_pair):
         self.eye_pair = eye_pair
@@ -209,15 +364,13 @@ class AnimationManager:
         self.animation_start_time = 0
         
         # Blinking 
-        self.shrinking = True
-        self.blink_speed = 20
-        self.last_blink_time = 0 
+        self.blink_start_time = 0
+        self.blink_duration = 400 # Closing and reopening the eyes once
+        self.min_blink_height = 10
         self.blink_interval = random.uniform(2000, 4000)
+        self.next_blink_time = self.blink_interval
         self.blink_type = "single"  # "single" or "double", single as default
-        self.current_blink_count = 0
         self.target_blink_count = 1
-        self.blink_pause_start_time = 0
-        self.blink_paused = False
         self.blink_pause_duration = 150  
         
         # Laughing 
@@ -242,8 +395,8 @@ class AnimationManager:
         self.move_speed = 10
         self.max_move_distance = 200
         self.squinting_degree = 5
-        self.last_look_time = 0 
         self.look_interval = random.uniform(10000, 20000)
+        self.next_look_time = self.look_interval
         self.looking_direction = 1
         self.moving_away = True
         self.look_paused = False
@@ -253,6 +406,10 @@ class AnimationManager:
         self.concentrate_duration = 2000 
         self.concentrate_start_time = 0
         self.concentrate_indefinite = False
+        self.concentrate_height = 60
+        self.concentrate_transition_duration = 160
+        self.concentrate_shrink_start_time = 0
+        self.concentrate_expand_start_time = None
 
         # Loading
         self.loader_angle = 0
@@ -267,45 +424,67 @@ class AnimationManager:
         self.listening_color = (0,255,150)
         self.listening_dark_color = (0, 150, 90)
         self.listening_start_time = 0
-        self.listening_pulse_speed = 1.5
+        self.listening_pulse_speed = 1.5 # Radians per second
         self.listening_size_amplitude = 25
+        self._listening_color_delta = tuple(end - start for start, end in zip(self.listening_color, self.listening_dark_color))
 
         # Not Listening
         self.not_listening_active = False
         self.not_listening_color = (255, 0, 0)
 
+        # Pre-sampled random parameters for blinks and looks, used round-robin
+        self._blink_intervals = array('d', (random.uniform(3000, 8000) for _ in range(_RANDOM_POOL_SIZE)))
+        self._double_blinks = bytes(random.choices([0, 1], weights=[3, 1], k=_RANDOM_POOL_SIZE))
+        self._blink_random_index = 0
+        self._look_intervals = array('d', (random.uniform(10000, 20000) for _ in range(_RANDOM_POOL_SIZE)))
+        self._look_directions = array('b', random.choices([1, -1], k=_RANDOM_POOL_SIZE))
+        self._look_random_index = 0
+
+        # Per-frame update for each animated state
+        self._state_updaters = {
+            AnimationState.LAUGHING: self._animate_laugh,
+            AnimationState.SMILING: self._animate_smile,
+            AnimationState.STAR: self._animate_star,
+            AnimationState.MOVING: self._animate_look,
+            AnimationState.CONCENTRATING: self._animate_concentrate,
+            AnimationState.BLINKING: self._animate_blink,
+            AnimationState.LOADING: self._animate_loading,
+            AnimationState.ERROR: self._animate_error,
+            AnimationState.LISTENING: self._animate_listening,
+        }
+
     def update(self, current_time_ticks):
         self.current_time = current_time_ticks
         
         if self.current_state == AnimationState.IDLE:
-            if self.current_time - self.last_blink_time > self.blink_interval:
+            if self.current_time > self.next_blink_time:
                 self.trigger_blinking()
-            # elif self.current_time - self.last_look_time > self.look_interval:
+            # elif self.current_time > self.next_look_time:
                 # self.trigger_look()
         
-        if self.current_state == AnimationState.LAUGHING:
-            self._animate_laugh()
-        elif self.current_state == AnimationState.SMILING:
-            if self._check_timed_animation_completed(self.smile_start_time, self.smile_duration):
-                self.set_state(AnimationState.IDLE)
-        elif self.current_state == AnimationState.STAR:
-            self._animate_star()
-        elif self.current_state == AnimationState.MOVING:
-            self._animate_sideways_look(self.looking_direction)
-        elif self.current_state == AnimationState.CONCENTRATING:
-            self._animate_concentrate()
-        elif self.current_state == AnimationState.BLINKING:
-            self._animate_blink()
-        elif self.current_state == AnimationState.LOADING:
-            self._animate_loading()
-        elif self.current_state == AnimationState.ERROR:
-            self._animate_error()
-        elif self.current_state == AnimationState.LISTENING:
-            self._animate_listening()
+        updater = self._state_updaters.get(self.current_state)
+        if updater is not None:
+            updater()
 
         if self.not_listening_active:
-            self.eye_pair.left_eye.color = self.not_listening_color
-            self.eye_pair.right_eye.color = self.not_listening_color
+            self.eye_pair.set_color(self.not_listening_color)
+
+    def is_static(self):
+        """Returns True while nothing on screen changes until the next blink or command."""
+        return self.current_state == AnimationState.IDLE and not self.not_listening_active
+
+    def get_frame_signature(self):
+        """Returns a tuple of everything the rendered frame depends on; equal signatures mean identical frames."""
+        left_eye = self.eye_pair.left_eye
+        right_eye = self.eye_pair.right_eye
+        return (
+            self.current_state, tuple(left_eye.rect), tuple(right_eye.rect), left_eye.color, right_eye.color,
+            self.laugh_offset, self.star_scale, self.loader_angle,
+        )
+
+    def get_ms_until_next_blink(self):
+        """Returns the time in milliseconds until the next idle blink is due."""
+        return max(0, self.next_blink_time - self.current_time)
 
     def set_state(self, new_state):
         if new_state != self.current_state:
@@ -343,7 +522,9 @@ class AnimationManager:
         self.set_state(AnimationState.CONCENTRATING)
         self.concentrate_start_time = self.current_time
         self.concentrate_indefinite = indefinite
-        self.shrinking = True 
+        # Continue from the current height, so triggering again does not make the eyes jump
+        self.concentrate_shrink_start_time = self.current_time - self._get_concentrate_progress() * self.concentrate_transition_duration
+        self.concentrate_expand_start_time = None
         self.concentrate_duration = duration if duration is not None and not indefinite else 2000
     
     def stop_concentrate(self):
@@ -365,23 +546,25 @@ class AnimationManager:
     def trigger_blinking(self):
         if self.current_state == AnimationState.IDLE:
             self.set_state(AnimationState.BLINKING)
-            self.shrinking = True
-            self.last_blink_time = self.current_time 
-            self.blink_interval = random.uniform(3000, 8000)
+            self.blink_start_time = self.current_time
+            i = self._blink_random_index & (_RANDOM_POOL_SIZE - 1)
+            self._blink_random_index += 1
+            self.blink_interval = self._blink_intervals[i]
+            self.next_blink_time = self.current_time + self.blink_interval
             
-            self.blink_type = random.choices(["single", "double"], weights=[3, 1])[0]
+            self.blink_type = "double" if self._double_blinks[i] else "single"
             self.target_blink_count = 1 if self.blink_type == "single" else 2
-            self.current_blink_count = 0
-            self.blink_paused = False
 
     def trigger_look(self):
         if self.current_state == AnimationState.IDLE:
             self.set_state(AnimationState.MOVING)
             self.moving_away = True
-            self.looking_direction = random.choice([1, -1])
+            i = self._look_random_index & (_RANDOM_POOL_SIZE - 1)
+            self._look_random_index += 1
+            self.looking_direction = self._look_directions[i]
             self.look_paused = False
-            self.last_look_time = self.current_time 
-            self.look_interval = random.uniform(10000, 20000)
+            self.look_interval = self._look_intervals[i]
+            self.next_look_time = self.current_time + self.look_interval
 
     def trigger_loading(self):
         self.set_state(AnimationState.LOADING)
@@ -408,14 +591,12 @@ class AnimationManager:
             
             self.set_state(AnimationState.LISTENING)
             
-            self.eye_pair.left_eye.color = self.listening_color
-            self.eye_pair.right_eye.color = self.listening_color
+            self.eye_pair.set_color(self.listening_color)
 
     def stop_listening(self):
         if self.current_state == AnimationState.LISTENING:
             self.eye_pair.reset()
-            self.eye_pair.left_eye.color = self.eye_pair.left_eye.original_color
-            self.eye_pair.right_eye.color = self.eye_pair.right_eye.original_color
+            self.eye_pair.restore_color()
             self.set_state(AnimationState.IDLE)
 
     def start_not_listening(self):
@@ -424,55 +605,57 @@ class AnimationManager:
     def stop_not_listening(self):
         self.not_listening_active = False
         self.eye_pair.reset()
-        self.eye_pair.left_eye.color = self.eye_pair.left_eye.original_color
-        self.eye_pair.right_eye.color = self.eye_pair.right_eye.original_color
+        self.eye_pair.restore_color()
 
     def _animate_blink(self):
-        if self.blink_paused:
-            if self.current_time - self.blink_pause_start_time > self.blink_pause_duration:
-                self.blink_paused = False
-                self.shrinking = True 
+        # The height follows directly from the time since the blink started,
+        # so dropped frames do not slow the blink down.
+        elapsed = self.current_time - self.blink_start_time
+        blink_cycle = self.blink_duration + self.blink_pause_duration
+        if elapsed >= self.target_blink_count * blink_cycle - self.blink_pause_duration:
+            self.eye_pair.reset()
+            self.set_state(AnimationState.IDLE)
             return
-        
-        if self.shrinking:
-            self.eye_pair.left_eye.grow(0, -self.blink_speed)
-            self.eye_pair.right_eye.grow(0, -self.blink_speed)
-            if self.eye_pair.left_eye.rect.height <= 10:
-                self.shrinking = False
-        else:
-            self.eye_pair.left_eye.grow(0, self.blink_speed)
-            self.eye_pair.right_eye.grow(0, self.blink_speed)
-            if self.eye_pair.left_eye.rect.height >= self.eye_pair.left_eye.original_rect.height:
-                self.current_blink_count += 1
-                
-                if self.current_blink_count < self.target_blink_count:
-                    self.eye_pair.reset()
-                    self.blink_paused = True
-                    self.blink_pause_start_time = self.current_time
-                else:
-                    self.eye_pair.reset() 
-                    self.set_state(AnimationState.IDLE)
-    
+
+        cycle_time = elapsed % blink_cycle
+        if cycle_time >= self.blink_duration:
+            # Eyes stay open during the pause between the blinks of a double blink
+            self.eye_pair.reset()
+            return
+
+        phase = cycle_time / self.blink_duration
+        original_height = self.eye_pair.left_eye.original_rect.height
+        height = max(int(original_height * abs(2 * phase - 1)), self.min_blink_height)
+        self.eye_pair.set_size_centered(0, height - original_height)
+
+    def _get_concentrate_progress(self):
+        """Returns how far the eyes have narrowed towards the concentrate height, from 0.0 to 1.0."""
+        original_height = self.eye_pair.left_eye.original_rect.height
+        narrowed = (original_height - self.eye_pair.left_eye.rect.height) / (original_height - self.concentrate_height)
+        return min(max(narrowed, 0.0), 1.0)
+
+    def _set_concentrate_progress(self, progress):
+        original_height = self.eye_pair.left_eye.original_rect.height
+        height = round(original_height - (original_height - self.concentrate_height) * progress)
+        self.eye_pair.set_size_centered(0, height - original_height)
+
     def _animate_concentrate(self):
-        if self.shrinking:
-            self.eye_pair.left_eye.grow(0, -self.blink_speed) 
-            self.eye_pair.right_eye.grow(0, -self.blink_speed)
-            if self.eye_pair.left_eye.rect.height <= 60: 
-                self.shrinking = False 
-        else: # Not shrinking: either holding or expanding
-            is_timed_out = self._check_timed_animation_completed(self.concentrate_start_time, self.concentrate_duration)
-            
-            if not self.concentrate_indefinite and is_timed_out:
-                # Time to expand and finish
-                self.eye_pair.left_eye.grow(0, self.blink_speed)
-                self.eye_pair.right_eye.grow(0, self.blink_speed)
-                if self.eye_pair.left_eye.rect.height >= self.eye_pair.left_eye.original_rect.height:
-                    self.eye_pair.reset()
-                    self.set_state(AnimationState.IDLE)
-            elif self.concentrate_indefinite:
-                # Holding indefinitely, do nothing until stop_concentrate is called
-                pass
-            # Else, it's timed but not yet timed out, so still holding.
+        transition_duration = self.concentrate_transition_duration
+        if self.concentrate_expand_start_time is None:
+            if not self._check_timed_animation_completed(self.concentrate_start_time, self.concentrate_duration):
+                # Narrowing, then holding until timed out or stop_concentrate is called
+                progress = (self.current_time - self.concentrate_shrink_start_time) / transition_duration
+                self._set_concentrate_progress(min(progress, 1.0))
+                return
+            # Time to expand and finish, starting from the current height
+            self.concentrate_expand_start_time = self.current_time - (1.0 - self._get_concentrate_progress()) * transition_duration
+
+        progress = 1.0 - (self.current_time - self.concentrate_expand_start_time) / transition_duration
+        if progress <= 0.0:
+            self.eye_pair.reset()
+            self.set_state(AnimationState.IDLE)
+            return
+        self._set_concentrate_progress(progress)
 
     def _animate_laugh(self):
         if self.laugh_up:
@@ -487,6 +670,13 @@ class AnimationManager:
                 if self.laugh_cycle_count >= 4: 
                     self.set_state(AnimationState.IDLE)
     
+    def _animate_smile(self):
+        if self._check_timed_animation_completed(self.smile_start_time, self.smile_duration):
+            self.set_state(AnimationState.IDLE)
+
+    def _animate_look(self):
+        self._animate_sideways_look(self.looking_direction)
+
     def _animate_star(self):
         time_elapsed = self.current_time - self.star_start_time
         
@@ -514,28 +704,23 @@ class AnimationManager:
     def _animate_listening(self):
         elapsed_time = (self.current_time - self.listening_start_time) / 1000.0
         
-        # Sinus-Welle für eine sanfte Oszillation (Wertebereich -1 bis 1)
-        # (pulse + 1) / 2 skaliert den Bereich auf 0.0 bis 1.0
-        pulse_factor = (math.sin(elapsed_time * self.listening_pulse_speed) + 1) / 2.0
+        # Sinus-Welle für eine sanfte Oszillation, aus der Tabelle bereits
+        # auf den Bereich 0.0 bis 1.0 skaliert
+        pulse_step = int(elapsed_time * self.listening_pulse_speed * _PULSE_STEPS / (math.pi * 2))
+        pulse_factor = _PULSE_LUT[pulse_step % _PULSE_STEPS]
         
         # Berechne Farbänderung
-        new_color_components = []
-        for start_comp, end_comp in zip(self.listening_color, self.listening_dark_color):
-            comp = start_comp + (end_comp - start_comp) * pulse_factor
-            new_color_components.append(int(comp))
-    
-        new_color = tuple(new_color_components)
+        start_color = self.listening_color
+        color_delta = self._listening_color_delta
+        new_color = (
+            int(start_color[0] + color_delta[0] * pulse_factor),
+            int(start_color[1] + color_delta[1] * pulse_factor),
+            int(start_color[2] + color_delta[2] * pulse_factor),
+        )
+        size_offset = int(self.listening_size_amplitude * pulse_factor)
         
-        for eye in [self.eye_pair.left_eye, self.eye_pair.right_eye]:
-            size_offset = self.listening_size_amplitude * pulse_factor
-            new_width = eye.original_rect.width + int(size_offset)
-            new_height = eye.original_rect.height + int(size_offset)
-            
-            eye.rect = pygame.Rect(0, 0, new_width, new_height)
-            
-            eye.rect.center = eye.original_rect.center
-            
-            eye.color = new_color
+        self.eye_pair.set_size_centered(size_offset, size_offset)
+        self.eye_pair.set_color(new_color)
     
     def _animate_sideways_look(self, direction):
         left_eye = self.eye_pair.left_eye
@@ -549,18 +734,15 @@ class AnimationManager:
             return 
 
         if self.moving_away:
-            left_eye.move(self.move_speed * direction, 0)
-            right_eye.move(self.move_speed * direction, 0)
+            self.eye_pair.move_both(self.move_speed * direction, 0)
             
             current_distance = abs(left_eye.rect.x - original_left_x)
             if current_distance < 100:
                 if left_eye.rect.height > original_height - 40:
-                    left_eye.grow(0, -self.squinting_degree)
-                    right_eye.grow(0, -self.squinting_degree)
+                    self.eye_pair.grow_both(0, -self.squinting_degree)
             else:
                 if left_eye.rect.height < original_height:
-                    left_eye.grow(0, self.squinting_degree)
-                    right_eye.grow(0, self.squinting_degree)
+                    self.eye_pair.grow_both(0, self.squinting_degree)
                 if direction > 0: right_eye.grow(4, 4)
                 else: left_eye.grow(4, 4)
             
@@ -575,9 +757,10 @@ class AnimationManager:
             if dist_to_origin < self.move_speed:
                  left_eye.rect.x = original_left_x
                  right_eye.rect.x = right_eye.original_rect.x 
+                 left_eye.update_center()
+                 right_eye.update_center()
             else:
-                left_eye.move(self.move_speed * move_back_direction, 0)
-                right_eye.move(self.move_speed * move_back_direction, 0)
+                self.eye_pair.move_both(self.move_speed * move_back_direction, 0)
             
             if left_eye.rect.height < original_height: left_eye.grow(0, self.squinting_degree)
             if right_eye.rect.height < original_height: right_eye.grow(0, self.squinting_degree)
@@ -590,14 +773,51 @@ class AnimationManager:
                 self.set_state(AnimationState.IDLE)
 
 
+# Commands are sent to the eye process as a one byte opcode, a one byte flag
+# telling whether a duration was given and a four byte duration in milliseconds.
+# Without the flag the animation uses its default duration, so an explicit 0
+# stays 0. _INDEFINITE_DURATION marks animations that run until they are stopped.
+_COMMAND_STRUCT = struct.Struct("<BBI")
+_INDEFINITE_DURATION = 0xFFFFFFFF
+_MAX_DURATION = _INDEFINITE_DURATION - 1
+_QUIT_OPCODE = 0xFF
+_OPCODES = {
+    "laugh": 1,
+    "smile": 2,
+    "star": 3,
+    "concentrate": 4,
+    "stop_concentrate": 5,
+    "loading": 6,
+    "stop_loading": 7,
+    "error": 8,
+    "stop_error": 9,
+    "listening": 10,
+    "stop_listening": 11,
+    "start_not_listening": 12,
+    "stop_not_listening": 13,
+    "quit": _QUIT_OPCODE,
+}
+# Ready-made payloads for commands sent with the default argument
+_DEFAULT_PAYLOADS = {name: _COMMAND_STRUCT.pack(opcode, 0, 0) for name, opcode in _OPCODES.items()}
+
+def _clamp_duration(duration_ms):
+    """
+    Converts a duration in milliseconds to a command argument, clamped to
+    0.._MAX_DURATION. Raises ValueError, TypeError or OverflowError for values
+    that are not finite numbers.
+    """
+    return min(max(int(duration_ms), 0), _MAX_DURATION)
+
+
 class MonkeyEyeApp:
-    def __init__(self, command_queue):
-        self.command_queue = command_queue
+    def __init__(self, command_conn):
+        self.command_conn = command_conn
         self.screen = None
-        self.clock = None
         self.background_color = (0, 0, 0)
         self.eyes = None
         self.animation = None
+        self._command_handlers = ()
+        self._last_frame_signature = None
         
         self.screen_width = 1280
         self.screen_height = 720
@@ -611,6 +831,11 @@ class MonkeyEyeApp:
         self.eye_y_offset = 100
         self.eye_x_offset = 70
 
+        # Upper bound for sleeping on the command pipe while the eyes are idle
+        self.idle_event_poll_ms = 100
+        # Frame interval of the animations (60 fps)
+        self.frame_interval_ms = 1000 // 60
+
     def _initialize_pygame_and_eyes(self):
         os.environ['DISPLAY'] = ':0'
         pygame.init()
@@ -623,9 +848,10 @@ class MonkeyEyeApp:
         pygame.mouse.set_visible(False)
         
         self.screen = pygame.display.set_mode((self.screen_width, self.screen_height), pygame.FULLSCREEN)
+        # The first frame clears and updates the whole screen
+        self._prev_dirty_rects = [self.screen.get_rect()]
         #self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
         pygame.display.set_caption("Monkey Eyes Animation")
-        self.clock = pygame.time.Clock()
         
         center_x = self.screen_width // 2
         eye_y = self.screen_height // 2 - self.eye_height // 2 - self.eye_y_offset
@@ -638,58 +864,121 @@ class MonkeyEyeApp:
             self.eye_radius, self.eye_color, self.background_color, self.star_color
         )
         self.animation = AnimationManager(self.eyes)
+        self._command_handlers = self._build_command_handlers()
         
         current_ticks = pygame.time.get_ticks()
-        self.animation.last_blink_time = current_ticks
-        self.animation.last_look_time = current_ticks
-
-    def _process_command(self, command_str):
-        parts = command_str.split(':')
-        cmd = parts[0]
-        args = parts[1:]
-
-        if cmd == "laugh": self.animation.trigger_laugh()
-        elif cmd == "smile":
-            duration = int(args[0]) if args and args[0].isdigit() else None
-            self.animation.trigger_smile(duration=duration)
-        elif cmd == "star":
-            duration = int(args[0]) if args and args[0].isdigit() else None
-            self.animation.trigger_star(duration=duration)
-        elif cmd == "concentrate":
-            if args and args[0] == "indefinite":
-                self.animation.trigger_concentrate(indefinite=True)
-            else:
-                duration = int(args[0]) if args and args[0].isdigit() else None
-                self.animation.trigger_concentrate(duration=duration, indefinite=False)
-        elif cmd == "stop_concentrate": self.animation.stop_concentrate()
-        elif cmd == "loading": self.animation.trigger_loading()
-        elif cmd == "stop_loading": self.animation.stop_loading()
-        elif cmd == "error":
-            if args and args[0] == "indefinite":
-                self.animation.trigger_error(indefinite=True)
-            else:
-                duration = int(args[0]) if args and args[0].isdigit() else None
-                self.animation.trigger_error(duration=duration, indefinite=False)
-        elif cmd == "stop_error": self.animation.stop_error()
-        elif cmd == "listening": self.animation.trigger_listening()
-        elif cmd == "stop_listening": self.animation.stop_listening()
-        elif cmd == "start_not_listening": self.animation.start_not_listening()
-        elif cmd == "stop_not_listening": self.animation.stop_not_listening()
-        else: print(f"EyeApp: Unknown command: {command_str}")
+        self.animation.next_blink_time = current_ticks + self.animation.blink_interval
+        self.animation.next_look_time = current_ticks + self.animation.look_interval
+
+    def _build_command_handlers(self):
+        """
+        Builds the table indexed by opcode holding handlers that take the
+        command's duration, or None if the command was sent without one.
+        """
+        animation = self.animation
+        handlers = {
+            "laugh": lambda arg: animation.trigger_laugh(),
+            "smile": lambda arg: animation.trigger_smile(duration=arg),
+            "star": lambda arg: animation.trigger_star(duration=arg),
+            "concentrate": lambda arg: animation.trigger_concentrate(
+                duration=arg, indefinite=arg == _INDEFINITE_DURATION
+            ),
+            "stop_concentrate": lambda arg: animation.stop_concentrate(),
+            "loading": lambda arg: animation.trigger_loading(),
+            "stop_loading": lambda arg: animation.stop_loading(),
+            "error": lambda arg: animation.trigger_error(
+                duration=arg, indefinite=arg == _INDEFINITE_DURATION
+            ),
+            "stop_error": lambda arg: animation.stop_error(),
+            "listening": lambda arg: animation.trigger_listening(),
+            "stop_listening": lambda arg: animation.stop_listening(),
+            "start_not_listening": lambda arg: animation.start_not_listening(),
+            "stop_not_listening": lambda arg: animation.stop_not_listening(),
+        }
+        table = [None] * 256
+        for name, handler in handlers.items():
+            table[_OPCODES[name]] = handler
+        return tuple(table)
+
+    def _process_command(self, payload):
+        opcode, has_duration, duration = _COMMAND_STRUCT.unpack(payload)
+        handler = self._command_handlers[opcode]
+        if handler is None:
+            print(f"EyeApp: Unknown command opcode: {opcode}")
+            return
+        handler(duration if has_duration else None)
+
+    def _render_frame(self):
+        """
+        Draws the current animation frame.
+
+        Only the areas covered by the eyes in this or the previous frame are
+        cleared and pushed to the display, instead of the whole screen.
+        """
+        current_state = self.animation.current_state
+        if current_state == AnimationState.LAUGHING:
+            dirty_rects = self.eyes.get_circular_bounds(self.animation.laugh_offset)
+        elif current_state == AnimationState.SMILING:
+            dirty_rects = self.eyes.get_circular_bounds(self.eyes.smile_vertical_offset)
+        else:
+            dirty_rects = self.eyes.get_bounds()
+        update_rects = self._prev_dirty_rects + dirty_rects
+        for rect in update_rects:
+            self.screen.fill(self.background_color, rect)
+
+        if current_state == AnimationState.LAUGHING:
+            self.eyes.draw_laughing(self.screen, self.animation.laugh_offset)
+        elif current_state == AnimationState.SMILING:
+            self.eyes.draw_smiling(self.screen)
+        elif current_state == AnimationState.STAR:
+            self.eyes.draw_stars(self.screen, self.animation.star_scale)
+        elif current_state == AnimationState.LOADING:
+            self.eyes.draw_loading(self.screen, self.animation.loader_angle)
+        elif current_state == AnimationState.ERROR:
+            self.eyes.draw_error(self.screen)
+        else: 
+            self.eyes.draw_normal(self.screen)
+
+        pygame.display.update(update_rects)
+        self._prev_dirty_rects = dirty_rects
+
+    def _drain_commands(self, pending=None):
+        """
+        Processes all pending commands.
+
+        Returns the number of processed commands, or None once 'quit' was
+        received or the controller closed the pipe.
+        """
+        commands = [pending] if pending is not None else []
+        try:
+            while self.command_conn.poll():
+                commands.append(self.command_conn.recv_bytes())
+        except EOFError: return None
+        for payload in commands:
+            if payload[0] == _QUIT_OPCODE: return None
+            self._process_command(payload)
+        return len(commands)
+
+    def _wait_for_command(self, timeout_ms):
+        """Blocks on the command pipe for up to timeout_ms. Returns the command or None."""
+        try:
+            if self.command_conn.poll(timeout_ms / 1000.0):
+                return self.command_conn.recv_bytes()
+        except EOFError:
+            # Let _drain_commands see the closed pipe and stop the loop
+            return _DEFAULT_PAYLOADS["quit"]
+        return None
 
     def run_app_loop(self):
         self._initialize_pygame_and_eyes()
         running = True
+        pending_command = None
         signal.signal(signal.SIGINT, signal.SIG_IGN)
         while running:
             current_ticks = pygame.time.get_ticks()
-            try:
-                while not self.command_queue.empty():
-                    command_str = self.command_queue.get_nowait()
-                    if command_str == "quit": running = False; break
-                    self._process_command(command_str)
-            except queue.Empty: pass
-            if not running: break
+            processed = self._drain_commands(pending_command)
+            pending_command = None
+            if processed is None: break
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT: running = False
@@ -697,24 +986,24 @@ class MonkeyEyeApp:
             if not running: break
 
             self.animation.update(current_ticks)
-            
-            self.screen.fill(self.background_color)
-            current_state = self.animation.current_state
-            if current_state == AnimationState.LAUGHING:
-                self.eyes.draw_laughing(self.screen, self.animation.laugh_offset)
-            elif current_state == AnimationState.SMILING:
-                self.eyes.draw_smiling(self.screen)
-            elif current_state == AnimationState.STAR:
-                self.eyes.draw_stars(self.screen, self.animation.star_scale)
-            elif current_state == AnimationState.LOADING:
-                self.eyes.draw_loading(self.screen, self.animation.loader_angle)
-            elif current_state == AnimationState.ERROR:
-                self.eyes.draw_error(self.screen)
-            else: 
-                self.eyes.draw_normal(self.screen)
-            
-            pygame.display.flip()
-            self.clock.tick(60)
+
+            # Skip clearing, drawing and updating the display while the frame on
+            # screen is identical to the one this update would draw.
+            frame_signature = self.animation.get_frame_signature()
+            if frame_signature != self._last_frame_signature:
+                self._render_frame()
+                self._last_frame_signature = frame_signature
+            elif self.animation.is_static():
+                # Sleep on the pipe until the next blink is due, waking up
+                # regularly to pump window events.
+                timeout_ms = min(self.animation.get_ms_until_next_blink(), self.idle_event_poll_ms)
+                pending_command = self._wait_for_command(timeout_ms)
+                continue
+
+            # Wait for the next frame on the pipe, so a command arriving in
+            # between is handled right away instead of after the frame.
+            frame_time_left = current_ticks + self.frame_interval_ms - pygame.time.get_ticks()
+            pending_command = self._wait_for_command(max(frame_time_left, 0))
         pygame.quit()
 
 class EyesController:
@@ -736,7 +1025,7 @@ class EyesController:
         >>> # Eyes window closes
     """
     def __init__(self):
-        self.command_queue = None
+        self.command_conn = None
         self.eye_process = None
 
     def start_eyes(self):
@@ -753,11 +1042,13 @@ class EyesController:
         if self.eye_process and self.eye_process.is_alive():
             print("EyesController: Eyes are already running.")
             return
-        self.command_queue = multiprocessing.Queue()
-        app_instance = MonkeyEyeApp(self.command_queue)
+        command_reader, self.command_conn = multiprocessing.Pipe(duplex=False)
+        app_instance = MonkeyEyeApp(command_reader)
         self.eye_process = multiprocessing.Process(target=app_instance.run_app_loop)
         self.eye_process.daemon = True 
         self.eye_process.start()
+        # The eye process has its own copy of the reading end
+        command_reader.close()
         print("EyesController: Monkey Eyes program started.")
 
     def stop_eyes(self):
@@ -774,8 +1065,8 @@ class EyesController:
         if not self.eye_process or not self.eye_process.is_alive():
             print("EyesController: Eyes are not running or already stopped.")
             return
-        if self.command_queue:
-            try: self.command_queue.put("quit")
+        if self.command_conn:
+            try: self.command_conn.send_bytes(_DEFAULT_PAYLOADS["quit"])
             except Exception as e: print(f"EyesController: Error sending quit command: {e}")
         if self.eye_process:
             self.eye_process.join(timeout=3) 
@@ -784,15 +1075,26 @@ class EyesController:
                 self.eye_process.terminate()
                 self.eye_process.join(timeout=1) 
         self.eye_process = None
-        self.command_queue = None
+        if self.command_conn:
+            self.command_conn.close()
+        self.command_conn = None
         print("EyesController: Monkey Eyes program stopped.")
 
-    def _send_command(self, command_str):
-        if not self.command_queue or (self.eye_process and not self.eye_process.is_alive()):
-            print(f"EyesController: Cannot send '{command_str}'. Eyes not running or queue unavailable.")
+    def _send_command(self, command, duration_ms=None, indefinite=False):
+        if not self.command_conn or (self.eye_process and not self.eye_process.is_alive()):
+            print(f"EyesController: Cannot send '{command}'. Eyes not running or pipe unavailable.")
             return
-        try: self.command_queue.put(command_str)
-        except Exception as e: print(f"EyesController: Error sending '{command_str}': {e}")
+        # Packed before the try block, so an invalid duration raises to the caller
+        # instead of being printed and dropped like a broken pipe
+        if indefinite:
+            payload = _COMMAND_STRUCT.pack(_OPCODES[command], 1, _INDEFINITE_DURATION)
+        elif duration_ms is not None:
+            payload = _COMMAND_STRUCT.pack(_OPCODES[command], 1, _clamp_duration(duration_ms))
+        else:
+            payload = _DEFAULT_PAYLOADS[command]
+        try:
+            self.command_conn.send_bytes(payload)
+        except Exception as e: print(f"EyesController: Error sending '{command}': {e}")
 
     def trigger_laugh(self):
         """
@@ -813,8 +1115,7 @@ class EyesController:
                 in milliseconds. If None, a default duration (e.g., 2000ms)
                 defined within the animation logic will be used.
         """
-        cmd = f"smile:{duration_ms}" if duration_ms is not None else "smile"
-        self._send_command(cmd)
+        self._send_command("smile", duration_ms)
     def trigger_star(self, duration_ms=None):
         """
         Triggers the star-eyes animation in the Monkey Eyes program.
@@ -826,8 +1127,7 @@ class EyesController:
                 animation in milliseconds. If None, a default duration
                 (e.g., 3000ms) defined within the animation logic will be used.
         """
-        cmd = f"star:{duration_ms}" if duration_ms is not None else "star"
-        self._send_command(cmd)
+        self._send_command("star", duration_ms)
     def trigger_concentrate(self, duration_ms=None, indefinite=False):
         """
         Triggers the concentrating (squinting) animation in the Monkey Eyes program.
@@ -843,10 +1143,7 @@ class EyesController:
                 concentrated state until `stop_concentrate()` is called.
                 Defaults to False.
         """
-        if indefinite: cmd = "concentrate:indefinite"
-        elif duration_ms is not None: cmd = f"concentrate:{duration_ms}"
-        else: cmd = "concentrate"
-        self._send_command(cmd)
+        self._send_command("concentrate", duration_ms, indefinite)
     def stop_concentrate(self): 
         """
         Stops an ongoing 'concentrate' animation.
@@ -883,13 +1180,7 @@ class EyesController:
             indefinite (bool, optional): If True, the eyes remain in the error
                 state until `stop_error()` is called. Defaults to False.
         """
-        if indefinite:
-            cmd = "error:indefinite"
-        elif duration_ms is not None:
-            cmd = f"error:{duration_ms}"
-        else:
-            cmd = "error"
-        self._send_command(cmd)
+        self._send_command("error", duration_ms, indefinite)
 
     def stop_error(self):
         """
@@ -1,5 +1,8 @@
 import asyncio
+import concurrent.futures
 import os
+import threading
+import time
 from typing import Union, Literal, Optional
 import httpx
 from loguru import logger
@@ -8,6 +11,7 @@ import json
 
 
 from utils.config_loader import AppConfig
+from utils.http_client import get_http_client
 
 from animation.monkey_eyes_lib import EyesController
 
@@ -28,9 +32,177 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 config_path = os.path.join(current_dir, "agent_config.yaml")
 app_config = AppConfig.load_from_yaml(config_path)
 
+# Backend endpoints, joined and parsed once instead of on every request
+_LOCATIONS_URL = httpx.URL(app_config.apis["base_url"] + app_config.apis["locations_url"])
+_DIRECTIONS_URL = httpx.URL(app_config.apis["base_url"] + app_config.apis["directions_url"])
+_QR_CODE_PROCESS_URL = httpx.URL(app_config.apis["base_url"] + app_config.apis["qr_code_process_url"])
+
+# Parameter schemas shared by the function definitions of all nodes
+_WAY_DESCRIPTION_PARAMETERS = {
+    "type": "object",
+    "properties": {
+        "destination": {"type": "string", "description": "Das gewünschte Ziel"}
+    },
+    "required": ["destination"],
+}
+_NO_PARAMETERS = {"type": "object", "properties": {}}
+
+# The locations only change when the building setup changes, so they are
+# fetched at most once per _LOCATIONS_TTL seconds.
+_LOCATIONS_TTL = 300.0
+_locations_cache: Optional[tuple[float, list, dict, str]] = None
+_locations_lock = asyncio.Lock()
+
+
+def _index_locations(locations: list) -> dict:
+    """Maps the casefolded name of each location to the location, keeping the first of equal names."""
+    return {location["name"].casefold(): location for location in reversed(locations)}
+
+
+# The printer is a single serial device, so receipts are printed one after
+# another on a dedicated thread that never blocks the event loop.
+_PRINTER_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="printer")
+
+
+def _print_directions_receipt(qr_payload: Optional[str], description: str) -> None:
+    """
+    Prints the QR code, if there is one, and the way description. Blocks until
+    everything is sent to the printer.
+    """
+    from utils.printer import setup_printer, print_qr, feed_paper_lines, close_printer, print_text
+
+    setup_printer()
+    if qr_payload:
+        print_qr(qr_payload)
+    print_text(description)
+    feed_paper_lines(15)
+    close_printer()
+
+
+# A QR scan holds its thread for seconds while the user presents the code,
+# so it gets its own worker instead of occupying the default executor.
+_CAMERA_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="qr-scan")
+
+
+# How long a scan waits for the user to present a code. The scan thread
+# checks its stop flag between frames, the extra seconds on the await only
+# cover a camera that stops delivering frames.
+_SCAN_TIMEOUT = 30.0
+_SCAN_STOP_GRACE = 5.0
+
+
+def shutdown_camera_executor() -> None:
+    """Stops accepting new scans without waiting for a running one to time out."""
+    _CAMERA_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+
+
+_TEST_LOCATIONS = [{"id": 1, "name": "Haupteingang"}, {"id": 2, "name": "Optometrist"}, {"id": 3, "name": "Radiologie"}, {"id": 4, "name": "Notaufnahme"}, {"id": 149, "name": "Oncology"}]
+_TEST_LOCATIONS_BY_NAME = _index_locations(_TEST_LOCATIONS)
+_TEST_LOCATION_NAMES = ", ".join([location["name"] for location in _TEST_LOCATIONS])
+
+
+async def _get_locations(client: httpx.AsyncClient) -> tuple[list, dict, str]:
+    """
+    Returns the locations from the backend, their index by casefolded name and
+    their comma-separated names, cached for _LOCATIONS_TTL seconds.
+    """
+    global _locations_cache
+    # The lock makes concurrent calls wait for a single request
+    async with _locations_lock:
+        now = time.monotonic()
+        if _locations_cache is not None and now - _locations_cache[0] < _LOCATIONS_TTL:
+            return _locations_cache[1], _locations_cache[2], _locations_cache[3]
+        locations_response = await client.get(_LOCATIONS_URL)
+        locations_response.raise_for_status()
+        locations = locations_response.json()
+        locations_by_name = _index_locations(locations)
+        location_names = ", ".join([location["name"] for location in locations])
+        _locations_cache = (now, locations, locations_by_name, location_names)
+        return locations, locations_by_name, location_names
+
+
+# The static part of the flow. create_flow_config only adds the handlers,
+# the prompts and schemas are shared by all conversations.
+_ROLE_PROMPT = "Du bist Koko, ein fröhlicher Roboter-Affe in einem Gebäude. Deine Aufgabe ist es, Menschen zu helfen und sie aufzuheitern. Sprich einfach und freundlich. Ganz wichtig: Deine Antworten werden direkt in Sprache umgewandelt. Deshalb darfst du auf gar keinen Fall Emojis, Smileys oder andere Sonderzeichen (wie *, #, etc.) verwenden. Deine Antwort muss immer reiner, einfacher Text sein, der vorgelesen werden kann. Nutze die verfügbaren Funktionen, um dem Mensch zu helfen."
+_GREETING_PROMPT = "Begrüße den Mensch fröhlich als Koko, der Roboter-Affe. Frage es, ob du ihm den Weg zu einem tollen Ort im Gebäude zeigen oder einen geheimen QR-Code für es scannen sollst. Warte auf die Antwort, bevor du `get_way_description` oder `scan_qr_code` aufrufst."
+_HANDLE_CHOICE_PROMPT = "Eine Funktion hat eine Antwort im 'tool'-Kontext geliefert. Deine Aufgabe ist es jetzt, eine Antwort für den Benutzer zu formulieren. Beginne, indem du den Inhalt des 'description'-Feldes aus dem 'tool'-Resultat **exakt und wortwörtlich wiedergibst, ohne jegliche Änderung oder Hinzufügung.** Frage direkt im Anschluss daran, ob der Benutzer noch etwas braucht oder ob das Gespräch beendet werden soll. Verwende `end_conversation`, wenn der Benutzer fertig ist."
+_END_PROMPT = "Verabschiede dich auf eine lustige und herzliche Affen-Art vom Benutzer. Wünsche ihm noch ganz viel Spaß und einen schönen Tag."
+
+_GET_WAY_DESCRIPTION_FUNCTION = {
+    "name": "get_way_description",
+    "description": "Erhält eine Wegbeschreibung zu einem Ziel.",
+    "parameters": _WAY_DESCRIPTION_PARAMETERS,
+}
+_SCAN_QR_CODE_FUNCTION = {
+    "name": "scan_qr_code",
+    "description": "Scannt einen QR-Code.",
+    "parameters": _NO_PARAMETERS,
+}
+
+_FLOW_TEMPLATE: FlowConfig = {
+    "initial_node": "greeting",
+    "nodes": {
+        "greeting": {
+            "role_messages": [{"role": "system", "content": _ROLE_PROMPT}],
+            "task_messages": [{"role": "system", "content": _GREETING_PROMPT}],
+            "functions": [
+                {
+                    "type": "function",
+                    "function": {**_GET_WAY_DESCRIPTION_FUNCTION, "transition_to": "handle_choice"},
+                },
+                {
+                    "type": "function",
+                    "function": {**_SCAN_QR_CODE_FUNCTION, "transition_to": "handle_choice"},
+                },
+                {
+                    "type": "function",
+                    "function": {
+                        "name": "end_conversation",
+                        "description": "Beendet das Gespräch, wenn der Benutzer keine Hilfe benötigt oder sich verabschiedet.",
+                        "parameters": _NO_PARAMETERS,
+                        "transition_to": "end",
+                    },
+                },
+            ],
+        },
+        "handle_choice": {
+            "task_messages": [{"role": "system", "content": _HANDLE_CHOICE_PROMPT}],
+            "functions": [
+                {"type": "function", "function": _GET_WAY_DESCRIPTION_FUNCTION},
+                {"type": "function", "function": _SCAN_QR_CODE_FUNCTION},
+                {
+                    "type": "function",
+                    "function": {
+                        "name": "end_conversation",
+                        "description": "Beendet das Gespräch.",
+                        "parameters": _NO_PARAMETERS,
+                        "transition_to": "end",
+                    },
+                },
+            ],
+        },
+        "end": {
+            "task_messages": [{"role": "system", "content": _END_PROMPT}],
+            "functions": [],
+            "post_actions": [{"type": "end_conversation"}],
+        },
+    },
+}
+
+
+def _bind_handlers(node: dict, handlers: dict) -> dict:
+    """Returns a copy of the template node whose function definitions carry the given handlers."""
+    functions = []
+    for function in node["functions"]:
+        handler = handlers.get(function["function"]["name"])
+        if handler is not None:
+            function = {**function, "function": {**function["function"], "handler": handler}}
+        functions.append(function)
+    return {**node, "functions": functions}
+
+
 def create_flow_config(journey_id: int, eyes_controller: EyesController, test: bool) -> FlowConfig:
     if not test:
-        from utils.printer import setup_printer, print_qr, feed_paper_lines, close_printer, print_text
         from utils.camera import _scan_qr_code_sync
 
     # Function handlers for the LLM
@@ -39,62 +211,60 @@ def create_flow_config(journey_id: int, eyes_controller: EyesController, test: b
         destination = args.get("destination", "dem Haupteingang")
         logger.debug(f"Providing way description to {destination}")
         
+        qr_code_data = None
         try:
-            async with httpx.AsyncClient() as client:
-                if test:
-                    locations = [{"id": 1, "name": "Haupteingang"}, {"id": 2, "name": "Optometrist"}, {"id": 3, "name": "Radiologie"}, {"id": 4, "name": "Notaufnahme"}, {"id": 149, "name": "Oncology"}]
-                else:
-                    eyes_controller.trigger_concentrate(indefinite=True)
-                    locations_response = await client.get(app_config.apis["base_url"] + app_config.apis["locations_url"])
-                    locations = locations_response.json()
+            client = get_http_client()
+            if test:
+                locations, locations_by_name, location_names = _TEST_LOCATIONS, _TEST_LOCATIONS_BY_NAME, _TEST_LOCATION_NAMES
+            else:
+                eyes_controller.trigger_concentrate(indefinite=True)
+                try:
+                    locations, locations_by_name, location_names = await _get_locations(client)
+                finally:
                     eyes_controller.stop_concentrate()
-                logger.debug(f"Received locations: {locations}")
+            logger.debug(f"Received locations: {locations}")
 
-                target_location = None
-                for location in locations:
-                    if location["name"].lower() == destination.lower():
-                        target_location = location
-                        break
+            target_location = locations_by_name.get(destination.casefold())
 
             description = ""
             if target_location:
-                async with httpx.AsyncClient() as client:
-                    location_id = target_location["id"]
-                    if test:
-                        description_data = {
-                            "routeDescription": f"Dies ist eine Testbeschreibung für {target_location['name']}.",
-                            "qrCode": {                            
-                                "token": "205299c9467fcd596f3d629f99364602",
-                                "destinationId": location_id,
-                                "journeyId": journey_id
-                            }
-                        }
-                    else:
-                        post_data = {
-                            "destinationLocationId": location_id,
+                location_id = target_location["id"]
+                if test:
+                    description_data = {
+                        "routeDescription": f"Dies ist eine Testbeschreibung für {target_location['name']}.",
+                        "qrCode": {                            
+                            "token": "205299c9467fcd596f3d629f99364602",
+                            "destinationId": location_id,
                             "journeyId": journey_id
                         }
-                        description_response = await client.post(
-                            app_config.apis["base_url"] + app_config.apis["directions_url"], 
-                            json=post_data)
-                        description_data = description_response.json()
-                    
-                    description = description_data.get("routeDescription", "Keine Wegbeschreibung gefunden.")
-                    qr_code_data = description_data.get("qrCode", None)
+                    }
+                else:
+                    post_data = {
+                        "destinationLocationId": location_id,
+                        "journeyId": journey_id
+                    }
+                    description_response = await client.post(
+                        _DIRECTIONS_URL,
+                        json=post_data)
+                    description_data = description_response.json()
+                
+                description = description_data.get("routeDescription", "Keine Wegbeschreibung gefunden.")
+                qr_code_data = description_data.get("qrCode", None)
             else:
-                description = f"Leider konnte ich keinen Ort namens '{destination}' finden. Bitte versuchen Sie es mit einem der folgenden Orte: " + ", ".join([loc['name'] for loc in locations]) + "."
+                description = f"Leider konnte ich keinen Ort namens '{destination}' finden. Bitte versuchen Sie es mit einem der folgenden Orte: " + location_names + "."
             
             if not test:
-                setup_printer()
-                print_qr(json.dumps(qr_code_data))
-                print_text(description)
-                feed_paper_lines(15)
-                close_printer()
+                loop = asyncio.get_running_loop()
+                qr_payload = json.dumps(qr_code_data) if qr_code_data is not None else None
+                await loop.run_in_executor(_PRINTER_EXECUTOR, _print_directions_receipt, qr_payload, description)
             eyes_controller.trigger_smile(2000)
             return WayDescriptionResult(description=description)
         except httpx.RequestError as e:
             logger.error(f"Error making API request: {e}")
             return ErrorResult(status="error", error="Wegbeschreibungsinformationen konnten nicht vom Server abgerufen werden.")
+        except httpx.HTTPStatusError as e:
+            logger.error(f"API request failed with status {e.response.status_code}: {e}")
+            return ErrorResult(status="error", error="Wegbeschreibungsinformationen konnten nicht vom Server abgerufen werden.")
         except Exception as e:
             logger.error(f"Error getting way description: {e}")
             return ErrorResult(status="error", error="Wegbeschreibung konnte nicht abgerufen werden.")
@@ -109,22 +279,35 @@ def create_flow_config(journey_id: int, eyes_controller: EyesController, test: b
                 qr_data = {"token": "205299c9467fcd596f3d629f99364602", "destinationId": 2, "journeyId": journey_id}
             else:
                 eyes_controller.trigger_concentrate(indefinite=True)
-                qr_data = await loop.run_in_executor(None, _scan_qr_code_sync)
-                eyes_controller.stop_concentrate()
+                stop_scan = threading.Event()
+                try:
+                    qr_data = await asyncio.wait_for(
+                        loop.run_in_executor(_CAMERA_EXECUTOR, _scan_qr_code_sync, _SCAN_TIMEOUT, stop_scan),
+                        timeout=_SCAN_TIMEOUT + _SCAN_STOP_GRACE)
+                except asyncio.TimeoutError:
+                    logger.warning("QR code scan did not finish in time")
+                    qr_data = None
+                finally:
+                    # Also stops the scan thread when the handler is cancelled
+                    stop_scan.set()
+                    eyes_controller.stop_concentrate()
             if qr_data:
-                async with httpx.AsyncClient() as client:
-                    try:
-                        if test:
-                            qr_data = qr_data
-                        else:
-                            qr_data = await client.post(app_config.apis["base_url"] + app_config.apis["qr_code_process_url"], json=qr_data)
-                            qr_data = qr_data.json()
-                    except httpx.RequestError as e:
-                        logger.error(f"Error making API request: {e}")
-                        return ErrorResult(status="error", error="QR-Code konnte nicht an den Server gesendet werden.")
-                    
-                    eyes_controller.trigger_star(2000)
-                    return QRCodeResult(status="success", data=qr_data)
+                client = get_http_client()
+                try:
+                    if not test:
+                        # Posted as the scanned text, the form the backend has always received
+                        response = await client.post(_QR_CODE_PROCESS_URL, json=qr_data)
+                        response.raise_for_status()
+                        qr_data = response.json()
+                except httpx.RequestError as e:
+                    logger.error(f"Error making API request: {e}")
+                    return ErrorResult(status="error", error="QR-Code konnte nicht an den Server gesendet werden.")
+                except httpx.HTTPStatusError as e:
+                    logger.error(f"API request failed with status {e.response.status_code}: {e}")
+                    return ErrorResult(status="error", error="QR-Code konnte vom Server nicht verarbeitet werden.")
+                
+                eyes_controller.trigger_star(2000)
+                return QRCodeResult(status="success", data=qr_data)
             else:
                 logger.warning("No QR code found during scan")
                 return QRCodeResult(status="not_found")
@@ -132,114 +315,8 @@ def create_flow_config(journey_id: int, eyes_controller: EyesController, test: b
             logger.error(f"Error scanning QR code: {e}")
             return ErrorResult(status="error", error="QR-Code konnte nicht gescannt werden.")
 
-
-    flow_config: FlowConfig = {
-        "initial_node": "greeting",
-        "nodes": {
-            "greeting": {
-                "role_messages": [
-                    {
-                        "role": "system",
-                        "content": "Du bist Koko, ein fröhlicher Roboter-Affe in einem Gebäude. Deine Aufgabe ist es, Menschen zu helfen und sie aufzuheitern. Sprich einfach und freundlich. Ganz wichtig: Deine Antworten werden direkt in Sprache umgewandelt. Deshalb darfst du auf gar keinen Fall Emojis, Smileys oder andere Sonderzeichen (wie *, #, etc.) verwenden. Deine Antwort muss immer reiner, einfacher Text sein, der vorgelesen werden kann. Nutze die verfügbaren Funktionen, um dem Mensch zu helfen.",
-                    }
-                ],
-                "task_messages": [
-                    {
-                        "role": "system",
-                        "content": "Begrüße den Mensch fröhlich als Koko, der Roboter-Affe. Frage es, ob du ihm den Weg zu einem tollen Ort im Gebäude zeigen oder einen geheimen QR-Code für es scannen sollst. Warte auf die Antwort, bevor du `get_way_description` oder `scan_qr_code` aufrufst.",
-                    }
-                ],
-                "functions": [
-                    {
-                        "type": "function",
-                        "function": {
-                            "name": "get_way_description",
-                            "handler": get_way_description,
-                            "description": "Erhält eine Wegbeschreibung zu einem Ziel.",
-                            "parameters": {
-                                "type": "object",
-                                "properties": {
-                                    "destination": {"type": "string", "description": "Das gewünschte Ziel"}
-                                },
-                                "required": ["destination"],
-                            },
-                            "transition_to": "handle_choice",
-                        },
-                    },
-                    {
-                        "type": "function",
-                        "function": {
-                            "name": "scan_qr_code",
-                            "handler": scan_qr_code,
-                            "description": "Scannt einen QR-Code.",
-                            "parameters": {"type": "object", "properties": {}},
-                            "transition_to": "handle_choice",
-                        },
-                    },
-                    {
-                        "type": "function",
-                        "function": {
-                            "name": "end_conversation",
-                            "description": "Beendet das Gespräch, wenn der Benutzer keine Hilfe benötigt oder sich verabschiedet.",
-                            "parameters": {"type": "object", "properties": {}},
-                            "transition_to": "end",
-                        },
-                    },
-                ],
-            },
-            "handle_choice": {
-                "task_messages": [
-                    {
-                        "role": "system",
-                        "content": "Eine Funktion hat eine Antwort im 'tool'-Kontext geliefert. Deine Aufgabe ist es jetzt, eine Antwort für den Benutzer zu formulieren. Beginne, indem du den Inhalt des 'description'-Feldes aus dem 'tool'-Resultat **exakt und wortwörtlich wiedergibst, ohne jegliche Änderung oder Hinzufügung.** Frage direkt im Anschluss daran, ob der Benutzer noch etwas braucht oder ob das Gespräch beendet werden soll. Verwende `end_conversation`, wenn der Benutzer fertig ist.",
-                    }
-                ],
-                "functions": [
-                    {
-                        "type": "function",
-                        "function": {
-                            "name": "get_way_description",
-                            "handler": get_way_description,
-                            "description": "Erhält eine Wegbeschreibung zu einem Ziel.",
-                            "parameters": {
-                                "type": "object",
-                                "properties": {
-                                    "destination": {"type": "string", "description": "Das gewünschte Ziel"}
-                                },
-                                "required": ["destination"],
-                            },
-                        },
-                    },
-                    {
-                        "type": "function",
-                        "function": {
-                            "name": "scan_qr_code",
-                            "handler": scan_qr_code,
-                            "description": "Scannt einen QR-Code.",
-                            "parameters": {"type": "object", "properties": {}},
-                        },
-                    },
-                    {
-                        "type": "function",
-                        "function": {
-                            "name": "end_conversation",
-                            "description": "Beendet das Gespräch.",
-                            "parameters": {"type": "object", "properties": {}},
-                            "transition_to": "end",
-                        },
-                    },
-                ],
-            },
-            "end": {
-                "task_messages": [
-                    {
-                        "role": "system",
-                        "content": "Verabschiede dich auf eine lustige und herzliche Affen-Art vom Benutzer. Wünsche ihm noch ganz viel Spaß und einen schönen Tag.",
-                    }
-                ],
-                "functions": [],
-                "post_actions": [{"type": "end_conversation"}],
-            },
-        },
+    handlers = {"get_way_description": get_way_description, "scan_qr_code": scan_qr_code}
+    return {
+        "initial_node": _FLOW_TEMPLATE["initial_node"],
+        "nodes": {name: _bind_handlers(node, handlers) for name, node in _FLOW_TEMPLATE["nodes"].items()},
     }
-    return flow_config
\ No newline at end of file
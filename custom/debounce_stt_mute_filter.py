@@ -20,6 +20,27 @@ from pipecat.frames.frames import (
 
 from animation.monkey_eyes_lib import EyesController
 
+# Frames, die verworfen werden, solange STT stummgeschaltet ist
+_FRAMES_TO_SUPPRESS = (
+    InputAudioRawFrame,
+    TranscriptionFrame,
+    InterimTranscriptionFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+    StartInterruptionFrame,
+)
+
+# Handler je Frame-Typ, in der Reihenfolge der früheren isinstance-Kette
+_FRAME_HANDLERS = (
+    (StartFrame, "_on_start"),
+    (BotStartedSpeakingFrame, "_on_bot_started_speaking"),
+    (BotStoppedSpeakingFrame, "_on_bot_stopped_speaking"),
+    (FunctionCallInProgressFrame, "_on_function_call_in_progress"),
+    (FunctionCallResultFrame, "_on_function_call_result"),
+    (UserStartedSpeakingFrame, "_on_user_started_speaking"),
+    (UserStoppedSpeakingFrame, "_on_user_stopped_speaking"),
+)
+
 class DebouncedSTTMuteFilter(FrameProcessor):
     """
     A custom FrameProcessor that mutes STT when the bot is speaking and for a
@@ -35,118 +56,172 @@ class DebouncedSTTMuteFilter(FrameProcessor):
         self.debounce_seconds = debounce_seconds
         self._is_muted = False
         self._bot_is_speaking = False
-        self._debounce_task = None
+        # Zeitpunkt (loop.time()), zu dem STT aktiviert wird, oder None, wenn kein Debounce läuft.
+        # Eine einzige Task wartet darauf, statt bei jedem Bot-Satz eine neue Task zu starten.
+        self._debounce_deadline = None
+        self._debounce_event = asyncio.Event()
+        self._debounce_loop_task = None
         self._user_interrupted = False
         self._function_call_in_progress = False
         self._first_bot_speech_complete_handled = False
         self._eyes_controller = eyes_controller
+        # Frame-Typ -> (Handler oder None, unterdrückbar); wird pro Typ einmal über die MRO bestimmt
+        self._frame_dispatch = {}
         logger.info(f"DebouncedSTTMuteFilter initialisiert mit {debounce_seconds}s Debounce.")
 
     async def _set_mute_state(self, mute: bool):
-        """Atomically sets the mute state and pushes the STTMuteFrame if the state changes."""
+        """
+        Atomically sets the mute state, updates the eyes and pushes the STTMuteFrame
+        if the state changes.
+        """
         if self._is_muted != mute:
+            # Die Augen zeigen den Mute-Zustand nur an den Flanken an, nicht bei jedem Frame
+            if mute:
+                self._eyes_controller.start_not_listening()
+            else:
+                self._eyes_controller.stop_not_listening()
             self._is_muted = mute
-            logger.debug(f"Aktion: STT wird {'stummgeschaltet' if mute else 'aktiviert'}.")
+            logger.debug("Aktion: STT wird {}.", "stummgeschaltet" if mute else "aktiviert")
             await self.push_frame(STTMuteFrame(mute=self._is_muted))
 
-    async def _start_unmute_debounce(self):
-        """Coroutine that waits for the debounce period and then unmutes."""
-        try:
-            await asyncio.sleep(self.debounce_seconds)
-            logger.debug(f"Logik: Debounce-Zeit abgelaufen. Setze alle Zustände zurück und aktiviere STT.")
-            # Reset everything to a clean state.
-            self._bot_is_speaking = False
-            self._user_interrupted = False
-            self._debounce_task = None
-            self._eyes_controller.stop_not_listening()
-            await self._set_mute_state(False)
-        except asyncio.CancelledError:
+    def _start_unmute_debounce(self):
+        """Starts (or restarts) the debounce period after which STT is unmuted."""
+        loop = asyncio.get_running_loop()
+        if self._debounce_loop_task is None:
+            self._debounce_loop_task = loop.create_task(self._debounce_loop())
+        self._debounce_deadline = loop.time() + self.debounce_seconds
+        self._debounce_event.set()
+
+    def _cancel_unmute_debounce(self):
+        """Cancels a running debounce period. The debounce loop notices it at the old deadline."""
+        if self._debounce_deadline is not None:
+            self._debounce_deadline = None
             logger.debug("Logik: Debounce zum Aktivieren wurde abgebrochen (Bot spricht wieder).")
 
+    async def _debounce_loop(self):
+        """Long-lived coroutine that unmutes once a debounce deadline has passed."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._debounce_event.wait()
+            self._debounce_event.clear()
+            while self._debounce_deadline is not None:
+                remaining = self._debounce_deadline - loop.time()
+                if remaining > 0:
+                    # Aufwachen, wenn die Frist abläuft oder neu gesetzt wird
+                    try:
+                        await asyncio.wait_for(self._debounce_event.wait(), timeout=remaining)
+                        self._debounce_event.clear()
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                self._debounce_deadline = None
+                logger.debug("Logik: Debounce-Zeit abgelaufen. Setze alle Zustände zurück und aktiviere STT.")
+                # Reset everything to a clean state.
+                self._bot_is_speaking = False
+                self._user_interrupted = False
+                await self._set_mute_state(False)
+
+    async def cleanup(self):
+        await super().cleanup()
+        if self._debounce_loop_task is not None:
+            self._debounce_loop_task.cancel()
+            try:
+                await self._debounce_loop_task
+            except asyncio.CancelledError:
+                pass
+            self._debounce_loop_task = None
+
+    async def _on_start(self, frame: Frame, direction: FrameDirection) -> bool:
+        if not self._first_bot_speech_complete_handled:
+            logger.info("Start des Gesprächs: STT wird initial stummgeschaltet, bis der Bot geantwortet hat.")
+            await self._set_mute_state(True)
+        # Frame trotzdem weiterleiten
+        await self.push_frame(frame, direction)
+        return True
+
+    async def _on_bot_started_speaking(self, frame: Frame, direction: FrameDirection) -> bool:
+        self._bot_is_speaking = True
+        logger.debug("EVENT: BotStartedSpeakingFrame. Schalte STT stumm.")
+        self._cancel_unmute_debounce()
+        await self._set_mute_state(True)
+        return True
+
+    async def _on_bot_stopped_speaking(self, frame: Frame, direction: FrameDirection) -> bool:
+        if not self._first_bot_speech_complete_handled:
+            logger.info("Erste Bot-Antwort empfangen. STT wird aktiviert.")
+            self._first_bot_speech_complete_handled = True
+
+        self._bot_is_speaking = False
+        logger.debug("EVENT: BotStoppedSpeakingFrame. Starte Debounce zum Zurücksetzen und Aktivieren.")
+        self._start_unmute_debounce()
+        return True
+
+    async def _on_function_call_in_progress(self, frame: Frame, direction: FrameDirection) -> bool:
+        self._function_call_in_progress = True
+        logger.debug("EVENT: FunctionCallInProgressFrame. Schalte STT stumm.")
+        self._cancel_unmute_debounce()
+        await self._set_mute_state(True)
+        return True
+
+    async def _on_function_call_result(self, frame: Frame, direction: FrameDirection) -> bool:
+        self._function_call_in_progress = False
+        logger.debug("EVENT: FunctionCallResultFrame. Starte Debounce zum Zurücksetzen und Aktivieren.")
+        if not self._bot_is_speaking and not self._function_call_in_progress:
+            await self._set_mute_state(False)
+        return True
+
+    async def _on_user_started_speaking(self, frame: Frame, direction: FrameDirection) -> bool:
+        if self._is_muted:
+            logger.debug("LOGIK: User hat während der Stummschaltung zu sprechen begonnen. Unterbrechung markiert.")
+            self._user_interrupted = True
+        else:
+            self._eyes_controller.trigger_listening()
+        return False
+
+    async def _on_user_stopped_speaking(self, frame: Frame, direction: FrameDirection) -> bool:
+        if self._user_interrupted:
+            logger.debug("LOGIK: Ende einer markierten Unterbrechung. Flag wird zurückgesetzt.")
+            self._user_interrupted = False
+            # The UserStoppedSpeakingFrame should still be suppressed.
+            return True
+        elif not self._is_muted:
+            self._eyes_controller.stop_listening()
+        return False
+
+    def _classify_frame_type(self, frame_type: type) -> tuple:
+        """Looks up the handler and suppression flag for a frame type once and remembers them."""
+        handler = None
+        for handled_type, handler_name in _FRAME_HANDLERS:
+            if issubclass(frame_type, handled_type):
+                handler = getattr(self, handler_name)
+                break
+        entry = (handler, issubclass(frame_type, _FRAMES_TO_SUPPRESS))
+        self._frame_dispatch[frame_type] = entry
+        return entry
+
     async def process_frame(self, frame: Frame, direction: FrameDirection):
         """Processes frames to manage STT mute state and suppresses frames when muted."""
 
         await super().process_frame(frame, direction)
 
-        if self._is_muted:
-            self._eyes_controller.start_not_listening()
-
-        if isinstance(frame, StartFrame):
-            if not self._first_bot_speech_complete_handled:
-                logger.info("Start des Gesprächs: STT wird initial stummgeschaltet, bis der Bot geantwortet hat.")
-                await self._set_mute_state(True)
-            # Frame trotzdem weiterleiten
-            await self.push_frame(frame, direction)
-            return
-    
-        if isinstance(frame, BotStartedSpeakingFrame):
-            self._bot_is_speaking = True
-            logger.debug("EVENT: BotStartedSpeakingFrame. Schalte STT stumm.")
-            if self._debounce_task:
-                self._debounce_task.cancel()
-                self._debounce_task = None
-            await self._set_mute_state(True)
-            return
+        # 1. Zustand anhand des Frame-Typs aktualisieren. Ein Handler gibt True
+        # zurück, wenn er den Frame vollständig behandelt hat.
+        frame_type = type(frame)
+        entry = self._frame_dispatch.get(frame_type)
+        if entry is None:
+            entry = self._classify_frame_type(frame_type)
+        handler, suppressible = entry
 
-        elif isinstance(frame, BotStoppedSpeakingFrame):
-            if not self._first_bot_speech_complete_handled:
-                logger.info("Erste Bot-Antwort empfangen. STT wird aktiviert.")
-                self._first_bot_speech_complete_handled = True
-            
-            self._bot_is_speaking = False
-            logger.debug(f"EVENT: BotStoppedSpeakingFrame. Starte Debounce zum Zurücksetzen und Aktivieren.")
-            if self._debounce_task:
-                self._debounce_task.cancel()
-            self._debounce_task = asyncio.create_task(self._start_unmute_debounce())
-            return
-        
-        elif isinstance(frame, FunctionCallInProgressFrame):
-            self._function_call_in_progress = True
-            logger.debug("EVENT: FunctionCallInProgressFrame. Schalte STT stumm.")
-            if self._debounce_task:
-                self._debounce_task.cancel()
-                self._debounce_task = None
-            await self._set_mute_state(True)
-            return
-        
-        elif isinstance(frame, FunctionCallResultFrame):
-            self._function_call_in_progress = False
-            logger.debug("EVENT: FunctionCallResultFrame. Starte Debounce zum Zurücksetzen und Aktivieren.")
-            if not self._bot_is_speaking and not self._function_call_in_progress:
-                await self._set_mute_state(False)
+        if handler is not None and await handler(frame, direction):
             return
-        
-        elif isinstance(frame, UserStartedSpeakingFrame):
-            if self._is_muted:
-                logger.debug("LOGIK: User hat während der Stummschaltung zu sprechen begonnen. Unterbrechung markiert.")
-                self._user_interrupted = True
-            else:
-                self._eyes_controller.trigger_listening()
-
-        elif isinstance(frame, UserStoppedSpeakingFrame):
-            if self._user_interrupted:
-                logger.debug("LOGIK: Ende einer markierten Unterbrechung. Flag wird zurückgesetzt.")
-                self._user_interrupted = False
-                # The UserStoppedSpeakingFrame should still be suppressed.
-                return
-            elif not self._is_muted:
-                self._eyes_controller.stop_listening()
 
         # 2. Frames filtern/unterdrücken basierend auf dem Mute-Status
-        frames_to_suppress = (
-            InputAudioRawFrame,
-            TranscriptionFrame,
-            InterimTranscriptionFrame,
-            UserStartedSpeakingFrame,
-            UserStoppedSpeakingFrame,
-            StartInterruptionFrame,
-        )
-
-        if isinstance(frame, frames_to_suppress):
+        if suppressible:
             if self._is_muted or self._user_interrupted:
-                logger.trace(f"Unterdrückt: {type(frame).__name__} (mute: {self._is_muted}, interrupted: {self._user_interrupted})")
+                # Argumente statt f-String: loguru formatiert erst, wenn TRACE aktiv ist
+                logger.trace("Unterdrückt: {} (mute: {}, interrupted: {})", frame_type.__name__, self._is_muted, self._user_interrupted)
                 return
 
         # 3. Alle anderen Frames (oder nicht unterdrückte Frames) normal weiterleiten
         await self.push_frame(frame, direction)
-
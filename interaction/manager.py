@@ -1,3 +1,5 @@
+import asyncio
+
 import httpx
 from loguru import logger
 
@@ -6,9 +8,10 @@ from pipecat.pipeline.runner import PipelineRunner
 from pipecat_flows import FlowManager
 
 from utils.config_loader import AppConfig
+from utils.http_client import get_http_client
 from animation.monkey_eyes_lib import EyesController
 from config.flow_config import create_flow_config
-from pipeline.builder import create_pipeline
+from pipeline.builder import create_pipeline, create_vad_analyzer
 
 class InteractionManager:
     def __init__(self, config: AppConfig, eyes_controller: EyesController, test_mode: bool = False):
@@ -21,11 +24,17 @@ class InteractionManager:
         self._eyes_controller.trigger_loading()
 
         try:
-            journey_id = await self._get_journey_id()
+            # Loading the VAD model takes a while and does not need the journey id,
+            # so it runs on a worker thread during the request. Everything that
+            # opens audio devices is only created once the journey id is known.
+            journey_id, vad_analyzer = await asyncio.gather(
+                self._get_journey_id(),
+                asyncio.to_thread(create_vad_analyzer, self._config),
+            )
             if not journey_id:
                 return
 
-            pipeline, llm, context_aggregator, tts = create_pipeline(self._config, self._eyes_controller)
+            pipeline, llm, context_aggregator, tts = create_pipeline(self._config, self._eyes_controller, vad_analyzer)
             task = PipelineTask(pipeline, params=PipelineParams(allow_interruptions=False))
             
             generated_flow_config = create_flow_config(journey_id, self._eyes_controller, test=self._test_mode)
@@ -60,22 +69,23 @@ class InteractionManager:
             logger.debug("Using test journey ID.")
             return 13
 
-        async with httpx.AsyncClient() as client:
-            url = self._config.apis["base_url"] + self._config.apis["interaction_started"]
-            logger.debug(f"Requesting journey ID from {url}")
-            try:
-                response = await client.post(url)
-                response.raise_for_status()
-                data = response.json()
-                journey_id = data.get("journeyId")
-                if not journey_id:
-                    logger.error(f"Journey ID not found in response: {data}")
-                    return None
-                logger.info(f"Received journey ID: {journey_id}")
-                return journey_id
-            except httpx.RequestError as e:
-                logger.error(f"Error making API request to start interaction: {e}")
-                return None
-            except Exception as e:
-                logger.error(f"An unexpected error occurred when getting journey ID: {e}")
+        # The shared client keeps the backend connection alive between interactions
+        client = get_http_client()
+        url = self._config.apis["base_url"] + self._config.apis["interaction_started"]
+        logger.debug(f"Requesting journey ID from {url}")
+        try:
+            response = await client.post(url)
+            response.raise_for_status()
+            data = response.json()
+            journey_id = data.get("journeyId")
+            if not journey_id:
+                logger.error(f"Journey ID not found in response: {data}")
                 return None
+            logger.info(f"Received journey ID: {journey_id}")
+            return journey_id
+        except httpx.RequestError as e:
+            logger.error(f"Error making API request to start interaction: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"An unexpected error occurred when getting journey ID: {e}")
+            return None
@@ -8,6 +8,8 @@ from gpiozero import Button
 from utils.config_loader import AppConfig
 from animation.monkey_eyes_lib import EyesController
 from utils.audio_patch import apply_patch
+from utils.http_client import close_http_client
+from config.flow_config import shutdown_camera_executor
 from interaction.manager import InteractionManager
 
 # Apply patch before anything else
@@ -50,6 +52,7 @@ class Application:
         logger.info("Shutting down...")
         self._eyes_controller.stop_eyes()
         logger.info("Eyes controller stopped.")
+        shutdown_camera_executor()
         logger.info("Cleanup complete.")
 
     def _handle_keyboard_input(self):
@@ -91,6 +94,7 @@ async def main():
         logger.info("KeyboardInterrupt received.")
     finally:
         app.shutdown()
+        await close_http_client()
 
 if __name__ == "__main__":
     try:
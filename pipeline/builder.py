@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 
 from pipecat.audio.vad.silero import SileroVADAnalyzer
 from pipecat.audio.vad.vad_analyzer import VADParams
@@ -15,30 +16,69 @@ from utils.config_loader import AppConfig
 from animation.monkey_eyes_lib import EyesController
 
 
+def _create_stt_service(config: AppConfig):
+    """
+    Creates the speech-to-text service selected in the `stt` section of the config.
+    "whisper" transcribes locally with faster-whisper and saves the round trip to
+    OpenAI for every utterance.
+    """
+    stt_settings = getattr(config, "stt", None) or {}
+    provider = stt_settings.get("provider", "openai")
+
+    if provider == "whisper":
+        # Only needed with pipecat-ai[whisper], so imported on demand
+        from pipecat.services.whisper.stt import WhisperSTTService
+        from pipecat.transcriptions.language import Language
+
+        return WhisperSTTService(
+            model=stt_settings.get("model", "small"),
+            device=stt_settings.get("device", "cpu"),
+            # int8 weights halve the memory traffic of the CTranslate2 model on the Pi's CPU
+            compute_type=stt_settings.get("compute_type", "int8"),
+            language=Language.DE,
+        )
+
+    return OpenAISTTService(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        language="de"
+    )
+
+
+def create_vad_analyzer(config: AppConfig) -> SileroVADAnalyzer:
+    """
+    Creates the Silero VAD analyzer, which loads its ONNX model in the constructor.
+
+    The analyzer is a plain object without audio devices or event loop state,
+    so it can be created on a worker thread and simply dropped if unused.
+    """
+    return SileroVADAnalyzer(params=VADParams(
+        confidence=config.vad_settings["confidence"],
+        start_secs=config.vad_settings["start_secs"],
+        stop_secs=config.vad_settings["stop_secs"],
+        min_volume=config.vad_settings["min_volume"],
+    ))
+
+
 def create_pipeline(
     config: AppConfig,
     eyes_controller: EyesController,
+    vad_analyzer: Optional[SileroVADAnalyzer] = None,
 ):
+    if vad_analyzer is None:
+        vad_analyzer = create_vad_analyzer(config)
+
     transport = LocalAudioTransport(
         params=LocalAudioTransportParams(
             audio_in_enabled=True,
             audio_out_enabled=True,
-            vad_analyzer=SileroVADAnalyzer(params=VADParams(
-                confidence=config.vad_settings["confidence"],
-                start_secs=config.vad_settings["start_secs"],
-                stop_secs=config.vad_settings["stop_secs"],
-                min_volume=config.vad_settings["min_volume"],
-            )),
+            vad_analyzer=vad_analyzer,
             audio_in_device_name=config.microphone["device_name"],
             audio_out_device_name=config.speaker["device_name"],
             audio_out_block_size=4096,
         ),
     )
 
-    stt = OpenAISTTService(
-        api_key=os.getenv("OPENAI_API_KEY"),
-        language="de"
-    )
+    stt = _create_stt_service(config)
 
     tts = OpenAITTSService(
         api_key=os.getenv("OPENAI_API_KEY"),
@@ -46,7 +86,14 @@ def create_pipeline(
         text_filters=[MarkdownTextFilter()],
     )
 
-    llm = OpenAILLMService(api_key=os.getenv("OPENAI_API_KEY"), model="gpt-4o")
+    # base_url lets the robots share an OpenAI-compatible server (e.g. vLLM) that
+    # batches their concurrent requests. Without it the OpenAI API is used.
+    llm_settings = getattr(config, "llm", None) or {}
+    llm = OpenAILLMService(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        model=llm_settings.get("model", "gpt-4o"),
+        base_url=llm_settings.get("base_url"),
+    )
 
     context = OpenAILLMContext()
     context_aggregator = llm.create_context_aggregator(context)
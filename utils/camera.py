@@ -1,58 +1,262 @@
-from picamera2 import Picamera2, Preview
-from pyzbar.pyzbar import decode
+from picamera2 import MappedArray, Picamera2, Preview
+from pyzbar.pyzbar import ZBarSymbol, decode
+import atexit
+import collections
+import concurrent.futures
+import threading
 import time
 import libcamera
 from typing import Union, Literal, Optional
 from loguru import logger
+import numpy as np
 
-# NEU: Helper-Funktion für den synchronen Kameracode
-def _scan_qr_code_sync(timeout: int = 30) -> Optional[str]:
+# zbar-py übergibt das Graustufenbild direkt an libzbar und spart pyzbars
+# Kopie und Umwandlung. Ohne zbar-py wird pyzbar verwendet. Der Scanner ist
+# nicht threadsicher, deshalb bekommt jeder Dekodier-Thread einen eigenen.
+try:
+    import zbar
+except ImportError:
+    zbar = None
+# Die python3-zbar-Bindings heißen ebenfalls "zbar", haben aber keinen Scanner.
+# Dann wird ebenfalls pyzbar verwendet.
+if zbar is not None and not hasattr(zbar, "Scanner"):
+    zbar = None
+_zbar_local = threading.local()
+
+# Nur QR-Codes suchen. Standardmäßig läuft zbar zusätzlich alle 1D-Decoder
+# (EAN, Code128, ...) über jedes Bild.
+_PYZBAR_SYMBOLS = [ZBarSymbol.QRCODE]
+_ZBAR_CONFIG = [("ZBAR_NONE", "ZBAR_CFG_ENABLE", 0), ("ZBAR_QRCODE", "ZBAR_CFG_ENABLE", 1)]
+
+# ZBar gibt während des Dekodierens den GIL frei. Zwei Threads dekodieren
+# deshalb auf einem Pi mit mehreren Kernen parallel, während das nächste
+# Bild aufgenommen wird.
+_DECODE_WORKERS = 2
+_decode_executor = concurrent.futures.ThreadPoolExecutor(max_workers=_DECODE_WORKERS, thread_name_prefix="qr-decode")
+
+_CAPTURE_WIDTH, _CAPTURE_HEIGHT = 640, 480
+
+# Ein Bild, dessen 8x8-Hash sich um weniger Bits vom zuletzt dekodierten Bild
+# unterscheidet, gilt als unverändert und wird nicht erneut dekodiert. Damit ein
+# Code in einer ruhigen Szene trotzdem gefunden wird, wird spätestens nach
+# _MAX_SKIPPED_FRAMES übersprungenen Bildern wieder dekodiert.
+_STATIC_HASH_BITS = 4
+_MAX_SKIPPED_FRAMES = 4
+
+# Die Kamera bleibt zwischen den Scans gestartet, weil die Initialisierung
+# auf dem Pi mehrere hundert Millisekunden dauert. Der Lock sorgt dafür,
+# dass immer nur ein Scan auf die Kamera zugreift.
+_camera: Optional[Picamera2] = None
+_camera_lock = threading.Lock()
+
+
+def _get_camera() -> Picamera2:
     """
-    Initialisiert die Kamera, sucht nach QR-Codes und gibt den Inhalt des ersten
-    gefundenen Codes zurück oder None nach einem Timeout.
-    Diese Funktion ist synchron und sollte in einem Thread ausgeführt werden.
+    Gibt die gestartete Kamera zurück und initialisiert sie beim ersten Aufruf.
+    Darf nur mit gehaltenem _camera_lock aufgerufen werden.
     """
-    picam2 = None
-    try:
+    global _camera
+    if _camera is None:
         logger.debug("Initialisiere Kamera...")
         picam2 = Picamera2()
-        config = picam2.create_preview_configuration(
-            main={"size": (640, 480)},
-            transform=libcamera.Transform(hflip=0, vflip=0)
-        )
-        picam2.configure(config)
-
-        # Die Vorschau ist für einen Agenten meist nicht nötig und kann
-        # zu Problemen führen, wenn keine GUI läuft.
-        #picam2.start_preview(Preview.QTGL) 
-        
-        picam2.start()
-        logger.info("Kamera gestartet. Suche nach QR-Codes...")
-        
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            buffer = picam2.capture_array()
-            decoded_objects = decode(buffer)
-
-            if decoded_objects:
-                # Nimm den ersten gefundenen Code
-                qr_data = decoded_objects[0].data.decode('utf-8')
-                logger.info(f"QR-Code gefunden! Inhalt: {qr_data}")
-                return qr_data # Wichtig: Daten zurückgeben
-
-            time.sleep(0.5) # Kurze Pause
-
-        logger.warning(f"Kein QR-Code innerhalb von {timeout} Sekunden gefunden.")
-        return None
+        try:
+            config = picam2.create_preview_configuration(
+                # YUV420 liefert die Helligkeit als eigene Y-Ebene, mehr braucht pyzbar nicht
+                main={"size": (_CAPTURE_WIDTH, _CAPTURE_HEIGHT), "format": "YUV420"},
+                transform=libcamera.Transform(hflip=0, vflip=0)
+            )
+            picam2.configure(config)
 
-    except Exception as e:
-        logger.error(f"Ein Fehler ist bei der Kameranutzung aufgetreten: {e}")
-        # Mögliche Fehler: Kamera wird bereits verwendet, oder ist nicht angeschlossen.
-        return None
-    finally:
-        if picam2:
-            if picam2.is_open:
-                picam2.stop()
-                logger.info("Kamera gestoppt.")
+            # Die Vorschau ist für einen Agenten meist nicht nötig und kann
+            # zu Problemen führen, wenn keine GUI läuft.
+            #picam2.start_preview(Preview.QTGL)
+
+            picam2.start()
+        except Exception:
             picam2.close()
-            logger.info("Kamera geschlossen.")
+            raise
+        _camera = picam2
+        logger.debug("Kamera gestartet.")
+    return _camera
+
+
+def _release_camera() -> None:
+    """Stoppt und schließt die Kamera. Darf nur mit gehaltenem _camera_lock aufgerufen werden."""
+    global _camera
+    if _camera is None:
+        return
+    picam2, _camera = _camera, None
+    try:
+        if picam2.is_open:
+            picam2.stop()
+            logger.info("Kamera gestoppt.")
+    finally:
+        picam2.close()
+        logger.info("Kamera geschlossen.")
+
+
+def close_camera() -> None:
+    """Gibt die Kamera frei, falls sie gestartet wurde."""
+    with _camera_lock:
+        _release_camera()
+
+
+atexit.register(close_camera)
+
+
+def _decode_qr_data(gray) -> Optional[bytes]:
+    """
+    Gibt die Daten des ersten erkannten Codes im Graustufenbild zurück oder None.
+    Zuerst wird jedes zweite Pixel in beide Richtungen dekodiert, was nur ein
+    Viertel der Arbeit kostet und für einen vor die Kamera gehaltenen Beleg
+    reicht. Kleine oder weit entfernte Codes werden in voller Auflösung gesucht.
+    """
+    data = _decode_gray(gray[::2, ::2])
+    if data is None:
+        data = _decode_gray(gray)
+    return data
+
+
+def _decode_gray(gray) -> Optional[bytes]:
+    """Dekodiert ein Graustufenbild mit zbar-py oder pyzbar."""
+    if zbar is not None:
+        scanner = getattr(_zbar_local, "scanner", None)
+        if scanner is None:
+            scanner = _zbar_local.scanner = zbar.Scanner(_ZBAR_CONFIG)
+        results = scanner.scan(np.ascontiguousarray(gray))
+    else:
+        # pyzbar würde das Array ohnehin mit tobytes() kopieren. Als (Bytes, Breite, Höhe)
+        # übergeben entfällt die Typ- und Form-Prüfung für Arrays und PIL-Bilder.
+        height, width = gray.shape
+        results = decode((gray.tobytes(), width, height), symbols=_PYZBAR_SYMBOLS)
+    return results[0].data if results else None
+
+
+def _frame_hash(gray) -> int:
+    """Mittelwert-Hash aus 8x8 Blöcken eines Graustufenbilds, jedes zehnte Pixel genügt dafür."""
+    sampled = gray[::10, ::10]
+    rows, cols = sampled.shape
+    blocks = sampled[:rows - rows % 8, :cols - cols % 8].reshape(8, rows // 8, 8, cols // 8).mean(axis=(1, 3))
+    return int.from_bytes(np.packbits(blocks > blocks.mean()).tobytes(), "little")
+
+
+def _request_hash(request) -> int:
+    """Berechnet den Hash der Y-Ebene einer Kameraanfrage, ohne sie freizugeben."""
+    with MappedArray(request, "main") as mapped:
+        return _frame_hash(mapped.array[:_CAPTURE_HEIGHT, :_CAPTURE_WIDTH])
+
+
+def _decode_request(request) -> Optional[bytes]:
+    """Dekodiert die Y-Ebene einer Kameraanfrage und gibt die Anfrage danach frei."""
+    try:
+        # MappedArray liest direkt aus dem Kamerapuffer, ohne das Bild zu kopieren.
+        # Die Y-Ebene liegt in den ersten Zeilen des YUV420-Arrays.
+        with MappedArray(request, "main") as mapped:
+            return _decode_qr_data(mapped.array[:_CAPTURE_HEIGHT, :_CAPTURE_WIDTH])
+    finally:
+        request.release()
+
+
+def _qr_text(data: bytes, ignored: set) -> Optional[str]:
+    """
+    Wandelt den Inhalt eines gefundenen QR-Codes in Text um. Ein Code, der kein
+    gültiges UTF-8 enthält, stammt nicht von unseren Belegen und ergibt None.
+    Er wird nur beim ersten Auftreten in ignored gemeldet, weil er meist über
+    viele Bilder hinweg im Sichtfeld bleibt.
+    """
+    try:
+        qr_data = data.decode('utf-8')
+    except UnicodeDecodeError:
+        if data not in ignored:
+            ignored.add(data)
+            logger.warning(f"QR-Code ohne gültiges UTF-8 ignoriert: {data!r}")
+        return None
+    logger.info(f"QR-Code gefunden! Inhalt: {qr_data}")
+    return qr_data
+
+
+# NEU: Helper-Funktion für den synchronen Kameracode
+def _scan_qr_code_sync(timeout: float = 30, stop_event: Optional[threading.Event] = None) -> Optional[str]:
+    """
+    Sucht mit der beim ersten Aufruf initialisierten Kamera nach QR-Codes und gibt
+    den Inhalt des ersten gefundenen Codes zurück oder None nach einem Timeout.
+    Wird stop_event gesetzt, endet die Suche vor dem nächsten Bild. Bereits
+    aufgenommene Bilder werden in beiden Fällen noch zu Ende dekodiert.
+    Diese Funktion ist synchron und sollte in einem Thread ausgeführt werden.
+    """
+    with _camera_lock:
+        try:
+            picam2 = _get_camera()
+            logger.debug("Suche nach QR-Codes...")
+
+            pending = collections.deque()
+            # Pro Bild aufgerufene Methoden einmal vor der Schleife auflösen
+            capture_request = picam2.capture_request
+            submit = _decode_executor.submit
+            monotonic = time.monotonic
+            stopped = stop_event.is_set if stop_event is not None else None
+            last_hash = None
+            skipped_frames = 0
+            cancelled = False
+            ignored_payloads = set()
+            try:
+                deadline = monotonic() + timeout
+                while monotonic() < deadline:
+                    if stopped is not None and stopped():
+                        cancelled = True
+                        break
+                    # capture_request() wartet auf das nächste Kamerabild, dadurch gibt
+                    # die Bildrate das Tempo der Schleife vor
+                    request = capture_request()
+                    try:
+                        frame_hash = _request_hash(request)
+                    except Exception:
+                        request.release()
+                        raise
+                    if (last_hash is not None and skipped_frames < _MAX_SKIPPED_FRAMES
+                            and (frame_hash ^ last_hash).bit_count() < _STATIC_HASH_BITS):
+                        # Die Szene hat sich seit dem letzten dekodierten Bild kaum verändert
+                        request.release()
+                        skipped_frames += 1
+                        continue
+                    last_hash = frame_hash
+                    skipped_frames = 0
+
+                    pending.append(submit(_decode_request, request))
+                    if len(pending) < _DECODE_WORKERS:
+                        continue
+
+                    # Höchstens _DECODE_WORKERS Bilder gleichzeitig, das älteste zuerst auswerten
+                    data = pending.popleft().result()
+                    if data is not None:
+                        # Nimm den ersten gefundenen Code, ein unlesbarer Inhalt zählt als kein Code
+                        qr_data = _qr_text(data, ignored_payloads)
+                        if qr_data is not None:
+                            return qr_data # Wichtig: Daten zurückgeben
+
+                # Bilder, die schon aufgenommen wurden, noch auswerten, bevor aufgegeben wird
+                while pending:
+                    data = pending.popleft().result()
+                    if data is not None:
+                        qr_data = _qr_text(data, ignored_payloads)
+                        if qr_data is not None:
+                            return qr_data
+            finally:
+                # Alle Anfragen müssen freigegeben sein, bevor die Kamera weiter benutzt wird
+                concurrent.futures.wait(pending)
+
+            if cancelled:
+                logger.debug("QR-Code-Suche abgebrochen.")
+            else:
+                logger.debug(f"Kein QR-Code innerhalb von {timeout} Sekunden gefunden.")
+            return None
+
+        except Exception as e:
+            logger.error(f"Ein Fehler ist bei der Kameranutzung aufgetreten: {e}")
+            # Mögliche Fehler: Kamera wird bereits verwendet, oder ist nicht angeschlossen.
+            # Beim nächsten Scan wird die Kamera neu initialisiert.
+            try:
+                _release_camera()
+            except Exception as close_error:
+                logger.error(f"Kamera konnte nicht geschlossen werden: {close_error}")
+            return None
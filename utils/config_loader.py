@@ -1,11 +1,34 @@
+import copy
+import os
+
 import yaml
 
+# The libyaml bindings parse many times faster than the pure-Python loader.
+# PyYAML builds without libyaml only provide SafeLoader.
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
+# Parsed config files keyed by absolute path together with their mtime, so main.py
+# and the flow config share one parse of agent_config.yaml. An edited file replaces
+# its entry. Every AppConfig gets its own deep copy, so changing one cannot leak
+# into the others.
+_config_cache = {}
+
 class AppConfig:
     def __init__(self, **entries):
         self.__dict__.update(entries)
 
     @classmethod
     def load_from_yaml(cls, file_path):
-        with open(file_path, 'r') as file:
-            config_data = yaml.safe_load(file)
-        return cls(**config_data)
\ No newline at end of file
+        path = os.path.abspath(file_path)
+        mtime = os.stat(path).st_mtime_ns
+        cached = _config_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            config_data = cached[1]
+        else:
+            with open(path, 'r') as file:
+                config_data = yaml.load(file, Loader=_SafeLoader)
+            _config_cache[path] = (mtime, config_data)
+        return cls(**copy.deepcopy(config_data))
@@ -0,0 +1,29 @@
+from typing import Optional
+
+import httpx
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the shared AsyncClient for backend requests, creating it on first use.
+
+    Reusing one client keeps the connections to the backend alive between
+    tool calls instead of opening a new connection for every request.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            timeout=httpx.Timeout(10.0, connect=5.0),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    """Closes the shared AsyncClient, if it was created."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
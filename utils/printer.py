@@ -3,26 +3,31 @@ import time
 import json
 import textwrap
 
+from loguru import logger
+
 my_serial = None # Global variable for the serial object
+# ESC/POS-Daten eines Belegs. Sie werden gesammelt und beim Schließen in einem
+# einzigen Schreibvorgang an den Drucker gesendet statt Befehl für Befehl.
+_receipt_buffer = bytearray()
 
 def feed_paper_lines(lines: int):
     """
     Vorschub des Papiers um eine bestimmte Anzahl von Zeilen.
     """
     if not my_serial or not my_serial.is_open:
-        print("Serielle Verbindung nicht initialisiert für Papierausgabe.")
+        logger.error("Serielle Verbindung nicht initialisiert für Papierausgabe.")
         return
     if not (0 <= lines <= 255):
-        print(f"Warnung: Ungültige Zeilenanzahl für Papierausgabe: {lines}. Muss zwischen 0 und 255 liegen.")
+        logger.warning(f"Ungültige Zeilenanzahl für Papierausgabe: {lines}. Muss zwischen 0 und 255 liegen.")
         return
 
     try:
         # ESC d n command
         command = bytes([0x1B, 0x64, lines])
-        my_serial.write(command)
-        print(f"Papier um {lines} Zeilen vorgeschoben.")
+        _receipt_buffer.extend(command)
+        logger.debug(f"Papiervorschub um {lines} Zeilen gepuffert.")
     except Exception as e:
-        print(f"Fehler beim Vorschub des Papiers: {e}")
+        logger.error(f"Fehler beim Vorschub des Papiers: {e}")
 
 def generate_custom_qr_code_data(content: str, module_size: int = 10) -> bytes:
     """
@@ -45,7 +50,7 @@ def generate_custom_qr_code_data(content: str, module_size: int = 10) -> bytes:
     # 2. Set QR Code Size/Module (GS ( k ... cn=49, fn=67)
     # Module size n (1-16, example uses 0x05)
     if not (1 <= module_size <= 16):
-        print(f"Warnung: Ungültige Modulgröße {module_size}. Verwende Standardgröße 5.")
+        logger.warning(f"Ungültige Modulgröße {module_size}. Verwende Standardgröße 5.")
         module_size_byte = 0x05
     else:
         module_size_byte = module_size
@@ -82,20 +87,21 @@ def setup_printer(SERIAL_PORT_MYSERIAL: str = '/dev/ttyAMA0', BAUDRATE_MYSERIAL:
     # Command for "Label verification" from your working script
     Com1_label_verification = bytes([0x1F, 0x63])
 
+    _receipt_buffer.clear()
     try:
         my_serial = serial.Serial(SERIAL_PORT_MYSERIAL, BAUDRATE_MYSERIAL, timeout=1)
-        print(f"Serielle Schnittstelle {SERIAL_PORT_MYSERIAL} mit {BAUDRATE_MYSERIAL} Baud geöffnet.")
+        logger.info(f"Serielle Schnittstelle {SERIAL_PORT_MYSERIAL} mit {BAUDRATE_MYSERIAL} Baud geöffnet.")
     except serial.SerialException as e:
-        print(f"Fehler beim Öffnen der seriellen Schnittstelle {SERIAL_PORT_MYSERIAL}: {e}")
+        logger.error(f"Fehler beim Öffnen der seriellen Schnittstelle {SERIAL_PORT_MYSERIAL}: {e}")
         exit()
 
     # Send your working initialization commands
     my_serial.write(Com_receipt_mode)
-    print(f"Com_receipt_mode gesendet: {Com_receipt_mode.hex()}")
+    logger.debug(f"Com_receipt_mode gesendet: {Com_receipt_mode.hex()}")
     time.sleep(0.2) # Short delay after mode set
 
     my_serial.write(Com1_label_verification)
-    print(f"Com1_label_verification gesendet: {Com1_label_verification.hex()}")
+    logger.debug(f"Com1_label_verification gesendet: {Com1_label_verification.hex()}")
     time.sleep(0.2) # Short delay
 
     # It's good practice to ensure the printer is in a known state.
@@ -105,38 +111,38 @@ def setup_printer(SERIAL_PORT_MYSERIAL: str = '/dev/ttyAMA0', BAUDRATE_MYSERIAL:
     # my_serial.write(bytes([0x1B, 0x40])) # ESC @ Initialize printer
     # time.sleep(0.1)
 
-    print("Setup abgeschlossen.")
+    logger.info("Setup abgeschlossen.")
 
 def print_text(text_to_print: str):
     if not my_serial or not my_serial.is_open:
-        print("Serielle Verbindung nicht initialisiert für Textdruck.")
+        logger.error("Serielle Verbindung nicht initialisiert für Textdruck.")
         return
     try:
-        my_serial.write(text_to_print.encode('cp437'))
-        print(f"Text gesendet: {text_to_print.strip()}")
+        _receipt_buffer.extend(text_to_print.encode('cp437'))
+        logger.debug(f"Text gepuffert: {text_to_print.strip()}")
     except Exception as e:
-        print(f"Fehler beim Senden von Text: {e}")
+        logger.error(f"Fehler beim Senden von Text: {e}")
 
 def print_qr(content_for_qr: str):
     if not my_serial or not my_serial.is_open:
-        print("Serielle Verbindung nicht initialisiert für QR-Druck.")
+        logger.error("Serielle Verbindung nicht initialisiert für QR-Druck.")
         return
     try:
         qr_payload = generate_custom_qr_code_data(content_for_qr)
-        print(f"Sende QR-Code für: '{content_for_qr}' ({len(qr_payload)} Bytes): {qr_payload.hex().upper()}")
-        my_serial.write(qr_payload)
+        logger.debug(f"Puffere QR-Code für: '{content_for_qr}' ({len(qr_payload)} Bytes): {qr_payload.hex().upper()}")
+        _receipt_buffer.extend(qr_payload)
         # Add some line feeds for spacing after the QR code
-        my_serial.write(b'\n\n\n')
-        print("QR-Code-Daten gesendet.")
+        _receipt_buffer.extend(b'\n\n\n')
+        logger.debug("QR-Code-Daten gepuffert.")
     except Exception as e:
-        print(f"Fehler beim Senden des QR-Codes: {e}")
+        logger.error(f"Fehler beim Senden des QR-Codes: {e}")
 
 def print_ice_cream():
     """
     Druckt eine vordefinierte ASCII-Art von Eis auf den Thermodrucker.
     """
     if not my_serial or not my_serial.is_open:
-        print("Serielle Verbindung nicht initialisiert für den Eis-Druck.")
+        logger.error("Serielle Verbindung nicht initialisiert für den Eis-Druck.")
         return
 
     ice_cream_art = r'''
@@ -159,10 +165,10 @@ Kleine Belohnung und Abkuehlung:
     try:
         # Set alignment to left to preserve ASCII art formatting
         align_left_command = bytes([0x1B, 0x61, 0x00])
-        my_serial.write(align_left_command)
+        _receipt_buffer.extend(align_left_command)
 
         # This acts as a "kick" to ensure the printer is ready for the first line of art.
-        my_serial.write(b' \n')
+        _receipt_buffer.extend(b' \n')
 
         # Clean the art string before printing.
         # This removes the indentation from the code block itself.
@@ -171,12 +177,24 @@ Kleine Belohnung und Abkuehlung:
         # Print each line of the art
         for line in processed_art.split('\n'):
             line_to_print = line + '\n' # Add a newline character to each line
-            my_serial.write(line_to_print.encode('cp437'))
+            _receipt_buffer.extend(line_to_print.encode('cp437'))
 
     except Exception as e:
-        print(f"Fehler beim Drucken des Eises: {e}")
+        logger.error(f"Fehler beim Drucken des Eises: {e}")
 
 def close_printer():
+    """
+    Sendet den gepufferten Beleg in einem Schreibvorgang und schließt die serielle Schnittstelle.
+    """
     if my_serial and my_serial.is_open:
+        if _receipt_buffer:
+            try:
+                my_serial.write(_receipt_buffer)
+                my_serial.flush()
+                logger.info(f"Beleg gesendet ({len(_receipt_buffer)} Bytes).")
+            except Exception as e:
+                logger.error(f"Fehler beim Senden des Belegs: {e}")
+            finally:
+                _receipt_buffer.clear()
         my_serial.close()
-        print("Serielle Schnittstelle geschlossen.")
+        logger.info("Serielle Schnittstelle geschlossen.")